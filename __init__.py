@@ -4,5 +4,11 @@ RoboEye - Simple camera library for robotics projects
 
 from .camera import Camera
 from .display import Display
+from .recorder import Recorder
+from .governor import Governor
+from .pipeline import Pipeline
+from .profiler import SamplingProfiler
+from .cameras import CameraGroup, TiledView
 
-__all__ = ['Camera', 'Display']
\ No newline at end of file
+__all__ = ['Camera', 'Display', 'Recorder', 'Governor', 'Pipeline', 'SamplingProfiler',
+           'CameraGroup', 'TiledView']
\ No newline at end of file
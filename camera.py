@@ -5,39 +5,108 @@ Core camera functionality for the RoboEye library
 import os
 import time
 import threading
+from collections import deque
 import cv2
 import numpy as np
 from picamera2 import Picamera2
 import libcamera
 
 
+class Frame:
+    """A captured frame together with its sequence number, capture time and sensor metadata"""
+
+    __slots__ = ('id', 'timestamp', 'image', 'metadata', 'sensor_timestamp',
+                 'exposure_time', 'analogue_gain', 'digital_gain')
+
+    def __init__(self, frame_id, timestamp, image, metadata=None):
+        """Initialize the frame record
+
+        Args:
+            frame_id (int): Sequence number, increasing by one per captured frame
+            timestamp (float): Wall-clock capture time (time.time())
+            image (numpy.ndarray): Frame pixels
+            metadata (dict): libcamera metadata captured with the same request
+        """
+        self.id = frame_id
+        self.timestamp = timestamp
+        self.image = image
+        self.metadata = metadata or {}
+
+        # Sensor timestamp in nanoseconds on the monotonic clock, exposure in microseconds
+        self.sensor_timestamp = self.metadata.get('SensorTimestamp')
+        self.exposure_time = self.metadata.get('ExposureTime')
+        self.analogue_gain = self.metadata.get('AnalogueGain')
+        self.digital_gain = self.metadata.get('DigitalGain')
+
+    def age(self):
+        """Get the time since the sensor produced this frame
+
+        Falls back to the wall-clock capture time when the sensor timestamp
+        is not available.
+
+        Returns:
+            float: Age in seconds
+        """
+        if self.sensor_timestamp:
+            return (time.monotonic_ns() - self.sensor_timestamp) / 1e9
+        return time.time() - self.timestamp
+
+
 class Camera:
     """Camera class to handle camera operations"""
 
-    def __init__(self, size=(640, 480), vflip=False, hflip=False):
+    def __init__(self, size=(640, 480), vflip=False, hflip=False, history_size=8, frame_rate=15,
+                 still_size=None, camera_num=0):
         """Initialize the camera with given parameters
 
         Args:
             size (tuple): Camera resolution (width, height)
             vflip (bool): Flip camera vertically
             hflip (bool): Flip camera horizontally
+            history_size (int): Number of recent frames kept addressable by id
+            frame_rate (float): Capture frame rate
+            still_size (tuple): Resolution of capture_still(), full sensor resolution if None
+            camera_num (int): Index of the camera when several are connected
         """
         self.camera_size = size
         self.camera_width = size[0]
         self.camera_height = size[1]
         self.camera_vflip = vflip
         self.camera_hflip = hflip
+        self.frame_rate = frame_rate
+        self.still_size = still_size
+        self.camera_num = camera_num
+
+        # Resolution used for web streams, capture resolution if None
+        self.stream_size = None
 
         # Camera state
         self.is_running = False
         self.camera_thread = None
+        self.started_event = threading.Event()
         self.picam = None
+        self.still_config = None
+
+        # Commands executed by the camera thread between frames
+        self.commands = deque()
+
+        # Geometry changes, see on_geometry_change()
+        self.geometry_version = 0
+        self.geometry_callbacks = []
 
         # Frame storage - accessible from outside the class
         self.current_frame = None
+        self.frame_id = 0
+        self.frame_time = None
+        self.frame_history = deque(maxlen=history_size)
+        self.frame_condition = threading.Condition()
+
+        # Per-consumer frame statistics, keyed by consumer name
+        self.consumers = {}
 
         # FPS calculation
         self.fps = 0
+        self.loop_time = 0
         self.draw_fps = False
         self.fps_origin = (self.camera_width - 105, 20)
         self.fps_size = 0.6
@@ -46,19 +115,23 @@ class Camera:
         self.draw_detections_enabled = False
         self.draw_detections_confidence = False
 
+        # Telemetry published alongside the frames (steering angle, etc.)
+        self.telemetry = {}
+        self.telemetry_version = 0
+        self.telemetry_lock = threading.Lock()
+
     def start(self):
         """Start the camera in a separate thread"""
         if self.is_running:
             print("Camera is already running")
             return
 
+        self.started_event.clear()
         self.camera_thread = threading.Thread(target=self._camera_loop, daemon=True)
         self.camera_thread.start()
 
-        # Wait for camera to start
-        start_time = time.time()
-        while not self.is_running and time.time() - start_time < 5:
-            time.sleep(0.1)
+        # Wait for camera to start, the loop signals success and failure
+        self.started_event.wait(timeout=5)
 
         if not self.is_running:
             raise RuntimeError("Failed to start camera")
@@ -79,25 +152,16 @@ class Camera:
         """Main camera loop running in separate thread"""
         try:
             # Initialize picamera2
-            self.picam = Picamera2()
-
-            # Configure preview
-            preview_config = self.picam.preview_configuration
-            preview_config.size = self.camera_size
-            preview_config.format = 'RGB888'
-            preview_config.transform = libcamera.Transform(
-                hflip=self.camera_hflip,
-                vflip=self.camera_vflip
-            )
-            preview_config.colour_space = libcamera.ColorSpace.Sycc()
-            preview_config.buffer_count = 4
-            preview_config.queue = True
-            preview_config.controls = {'FrameRate': 15}
+            self.picam = Picamera2(self.camera_num)
+
+            # Configure preview, and prepare the still mode once so switching is fast
+            self.picam.configure(self._preview_config())
+            self.still_config = self._still_config()
 
             # Start camera
-            self.picam.configure(preview_config)
             self.picam.start()
             self.is_running = True
+            self.started_event.set()
 
             # FPS tracking
             fps_counter = 0
@@ -105,8 +169,18 @@ class Camera:
 
             # Main capture loop
             while self.is_running:
-                # Capture frame
-                frame = self.picam.capture_array()
+                # Apply reconfiguration and still captures between frames
+                while self.commands:
+                    self.commands.popleft()()
+
+                # Capture frame and its metadata from the same request
+                request = self.picam.capture_request()
+                try:
+                    frame = request.make_array('main')
+                    metadata = request.get_metadata()
+                finally:
+                    request.release()
+                loop_start = time.time()
 
                 # Calculate FPS
                 fps_counter += 1
@@ -132,17 +206,278 @@ class Camera:
                     frame = self.draw_detections(frame, self.current_detections)
 
                 # Update current frame
-                self.current_frame = frame
+                self._publish_frame(frame, metadata)
+
+                # Smoothed time spent processing each frame, excluding the capture wait
+                self.loop_time = 0.9 * self.loop_time + 0.1 * (time.time() - loop_start)
 
         except Exception as e:
             print(f"Camera error: {e}")
             self.is_running = False
         finally:
+            self.started_event.set()
+            with self.frame_condition:
+                self.frame_condition.notify_all()
             if self.picam:
                 self.picam.stop()
                 self.picam.close()
                 self.picam = None
 
+    def _preview_config(self, size=None, frame_rate=None, hflip=None, vflip=None):
+        """Build the preview configuration, using the current settings where not given"""
+        preview_config = self.picam.preview_configuration
+        preview_config.size = size or self.camera_size
+        preview_config.format = 'RGB888'
+        preview_config.transform = libcamera.Transform(
+            hflip=self.camera_hflip if hflip is None else hflip,
+            vflip=self.camera_vflip if vflip is None else vflip
+        )
+        preview_config.colour_space = libcamera.ColorSpace.Sycc()
+        preview_config.buffer_count = 4
+        preview_config.queue = True
+        preview_config.controls = {'FrameRate': frame_rate or self.frame_rate}
+        return preview_config
+
+    def _still_config(self, hflip=None, vflip=None):
+        """Build the still configuration, using the current settings where not given"""
+        return self.picam.create_still_configuration(
+            main={'size': self.still_size or self.picam.sensor_resolution, 'format': 'RGB888'},
+            transform=libcamera.Transform(
+                hflip=self.camera_hflip if hflip is None else hflip,
+                vflip=self.camera_vflip if vflip is None else vflip
+            ),
+            buffer_count=1
+        )
+
+    def _call_in_camera_thread(self, func, timeout=5):
+        """Run func on the camera thread between two frames and return its result"""
+        if threading.current_thread() is self.camera_thread:
+            return func()
+
+        done = threading.Event()
+        lock = threading.Lock()
+        result = {}
+        state = {'started': False, 'cancelled': False}
+
+        def command():
+            with lock:
+                if state['cancelled']:
+                    return
+                state['started'] = True
+            try:
+                result['value'] = func()
+            except Exception as e:
+                result['error'] = e
+            finally:
+                done.set()
+
+        self.commands.append(command)
+        if not done.wait(timeout):
+            with lock:
+                if not state['started']:
+                    # Withdraw the command so it does not run after the caller gave up
+                    state['cancelled'] = True
+                    try:
+                        self.commands.remove(command)
+                    except ValueError:
+                        pass
+                    raise RuntimeError("Camera did not respond")
+            # Already running, its outcome must be reported
+            done.wait()
+        if 'error' in result:
+            raise result['error']
+        return result.get('value')
+
+    def reconfigure(self, size=None, frame_rate=None, hflip=None, vflip=None):
+        """Change resolution, frame rate or transform without restarting the camera thread
+
+        The pipeline is stopped and restarted with the new configuration
+        between two frames. Frame history is cleared when the geometry
+        changes, and on_geometry_change() callbacks are notified. Settings
+        are only taken over once the camera runs with them: if the new
+        configuration fails, the camera keeps the previous one and the error
+        is raised.
+
+        Args:
+            size (tuple): New resolution (width, height)
+            frame_rate (float): New capture frame rate
+            hflip (bool): Flip camera horizontally
+            vflip (bool): Flip camera vertically
+        """
+        old_size = self.camera_size
+        new_size = tuple(size) if size is not None else self.camera_size
+        new_frame_rate = frame_rate if frame_rate is not None else self.frame_rate
+        new_hflip = hflip if hflip is not None else self.camera_hflip
+        new_vflip = vflip if vflip is not None else self.camera_vflip
+        geometry_changed = size is not None or hflip is not None or vflip is not None
+
+        def commit():
+            """Take over the new settings once the camera runs with them"""
+            old_origin = (self.camera_width - 105, 20)
+            self.camera_size = new_size
+            self.camera_width, self.camera_height = new_size
+            self.frame_rate = new_frame_rate
+            self.camera_hflip = new_hflip
+            self.camera_vflip = new_vflip
+            if self.fps_origin == old_origin:
+                self.fps_origin = (self.camera_width - 105, 20)
+            if geometry_changed:
+                # Frames of the old geometry must not be mixed with new ones
+                with self.frame_condition:
+                    self.frame_history.clear()
+                    self.geometry_version += 1
+
+        if self.is_running and self.picam and geometry_changed:
+            def apply():
+                self.picam.stop()
+                try:
+                    self.picam.configure(self._preview_config(new_size, new_frame_rate, new_hflip, new_vflip))
+                    still_config = self._still_config(new_hflip, new_vflip)
+                    self.picam.start()
+                except Exception:
+                    # Keep capturing with the configuration that worked
+                    self.picam.stop()
+                    self.picam.configure(self._preview_config())
+                    self.picam.start()
+                    raise
+                self.still_config = still_config
+                commit()
+            self._call_in_camera_thread(apply)
+        else:
+            if self.is_running and frame_rate is not None:
+                self.set_controls({'FrameRate': frame_rate})
+            commit()
+
+        if geometry_changed:
+            for callback in list(self.geometry_callbacks):
+                try:
+                    callback(self, old_size, self.camera_size)
+                except Exception as e:
+                    print(f"Geometry callback error: {e}")
+        return True
+
+    def on_geometry_change(self, callback):
+        """Register a callback for resolution or transform changes
+
+        Args:
+            callback (callable): callback(camera, old_size, new_size)
+        """
+        self.geometry_callbacks.append(callback)
+
+    def capture_still(self, timeout=10):
+        """Capture one frame in still mode and return to the preview mode
+
+        Args:
+            timeout (float): Maximum time to wait for the capture
+
+        Returns:
+            Frame: Still frame at still_size, not part of the frame history
+        """
+        if not self.is_running or not self.picam:
+            return None
+
+        image = self._call_in_camera_thread(
+            lambda: self.picam.switch_mode_and_capture_array(self.still_config),
+            timeout
+        )
+        return Frame(self.frame_id, time.time(), image)
+
+    def _publish_frame(self, frame, metadata=None):
+        """Store a new frame and wake up any waiting consumers"""
+        with self.frame_condition:
+            self.frame_id += 1
+            self.frame_time = time.time()
+            self.current_frame = frame
+            self.frame_history.append(Frame(self.frame_id, self.frame_time, frame, metadata))
+            self.frame_condition.notify_all()
+
+    def get_frame(self, frame_id=None):
+        """Get one of the recently captured frames
+
+        Args:
+            frame_id (int): Sequence number of the frame, latest frame if None
+
+        Returns:
+            Frame: The frame record, or None if it is no longer in the history
+        """
+        with self.frame_condition:
+            if not self.frame_history:
+                return None
+            if frame_id is None:
+                return self.frame_history[-1]
+            for frame in reversed(self.frame_history):
+                if frame.id == frame_id:
+                    return frame
+        return None
+
+    def wait_for_frame(self, after_id=0, timeout=None, consumer=None):
+        """Block until a frame newer than after_id has been captured
+
+        Args:
+            after_id (int): Sequence number the caller already has
+            timeout (float): Maximum time to wait in seconds, forever if None
+            consumer (str): Name under which received and skipped frames are counted
+
+        Returns:
+            Frame: The latest frame, or None if the wait timed out
+        """
+        with self.frame_condition:
+            # History is empty after a geometry change until the first new frame
+            ready = self.frame_condition.wait_for(
+                lambda: (self.frame_id > after_id and self.frame_history) or not self.is_running,
+                timeout
+            )
+            if not ready or self.frame_id <= after_id or not self.frame_history:
+                return None
+            frame = self.frame_history[-1]
+            self.count_frame(consumer, frame, after_id)
+            return frame
+
+    def count_frame(self, consumer, frame, after_id=0):
+        """Count a frame as received by a consumer, and the frames it skipped
+
+        Done by wait_for_frame(), call it directly for frames obtained with
+        consumer=None that the caller only accepts after further checks.
+
+        Args:
+            consumer (str): Consumer name, nothing is counted if None
+            frame (Frame): The frame the consumer received
+            after_id (int): Sequence number the consumer had before
+        """
+        if consumer is None:
+            return
+        with self.frame_condition:
+            stats = self.consumers.setdefault(consumer, {'frames': 0, 'skipped': 0})
+            stats['frames'] += 1
+            if after_id:
+                stats['skipped'] += frame.id - after_id - 1
+
+    def get_consumer_stats(self):
+        """Get received and skipped frame counts per consumer
+
+        Returns:
+            dict: {consumer name: {'frames': int, 'skipped': int}}
+        """
+        with self.frame_condition:
+            return {name: dict(stats) for name, stats in self.consumers.items()}
+
+    def set_frame_rate(self, frame_rate):
+        """Change the capture frame rate while running
+
+        Args:
+            frame_rate (float): New capture frame rate
+        """
+        self.frame_rate = frame_rate
+        self.set_controls({'FrameRate': frame_rate})
+
+    def set_stream_size(self, size):
+        """Set the resolution used for web streams
+
+        Args:
+            size (tuple): Stream resolution (width, height), capture resolution if None
+        """
+        self.stream_size = tuple(size) if size else None
+
     def set_controls(self, controls):
         """Set camera controls
 
@@ -153,9 +488,15 @@ class Camera:
             self.picam.set_controls(controls)
 
     def get_controls(self):
-        """Get current camera controls"""
-        if self.is_running and self.picam:
-            return self.picam.capture_metadata()
+        """Get the metadata of the latest frame
+
+        The metadata is captured together with each frame, so this does
+        not wait for another frame.
+        """
+        if self.is_running:
+            frame = self.get_frame()
+            if frame is not None:
+                return frame.metadata
         return None
 
     def show_fps(self, show=True, color=None, size=None, origin=None):
@@ -176,12 +517,13 @@ class Camera:
         if origin:
             self.fps_origin = origin
 
-    def take_photo(self, filename, path=''):
+    def take_photo(self, filename, path='', still=False):
         """Take a photo and save it to disk
 
         Args:
             filename (str): Name for the saved photo (without extension)
             path (str): Directory to save the photo (created if doesn't exist)
+            still (bool): Capture a still-mode frame instead of saving the preview frame
 
         Returns:
             bool: Success or failure
@@ -189,6 +531,13 @@ class Camera:
         if not self.is_running or self.current_frame is None:
             return False
 
+        image = self.current_frame
+        if still:
+            frame = self.capture_still()
+            if frame is None:
+                return False
+            image = frame.image
+
         # Default path is user's home directory Pictures folder
         if path is None:
             user = os.popen("echo ${SUDO_USER:-$(who -m | awk '{ print $1 }')}").readline().strip()
@@ -204,7 +553,7 @@ class Camera:
             if not os.path.exists(path):
                 os.makedirs(path, mode=0o751, exist_ok=True)
             full_path = f"{path}/{filename}.jpg"
-        return cv2.imwrite(full_path, self.current_frame)
+        return cv2.imwrite(full_path, image)
 
     def get_image(self):
         return self.current_frame
@@ -247,7 +596,28 @@ class Camera:
             or detection rectangles with confidence [(x1, y1, x2, y2, confidence), ...]
             if self.draw_detections_confidence is true
         """
-        self.current_detections = detections
+        with self.telemetry_lock:
+            self.current_detections = detections
+            self.telemetry_version += 1
+
+    def update_telemetry(self, **values):
+        """Update telemetry values published with the frames
+
+        Args:
+            **values: Named JSON-serializable values, e.g. steering=12.5
+        """
+        with self.telemetry_lock:
+            self.telemetry.update(values)
+            self.telemetry_version += 1
+
+    def get_telemetry(self):
+        """Get a consistent snapshot of detections and telemetry
+
+        Returns:
+            tuple: (version, detections, telemetry dict)
+        """
+        with self.telemetry_lock:
+            return self.telemetry_version, list(self.current_detections), dict(self.telemetry)
 
     def enable_detection_overlay(self, enable=True, confidence=False):
         """Enable or disable detection overlay
@@ -0,0 +1,318 @@
+"""
+Multi-camera support for RoboEye library
+"""
+
+import math
+import time
+import cv2
+import numpy as np
+from camera import Camera
+
+# Time a frame may take from capture until it is published by its camera
+PUBLISH_DELAY = 0.1
+
+
+def _frame_time(frame, sensor_clock):
+    """Capture time of a frame in seconds on the chosen clock"""
+    if sensor_clock:
+        return frame.sensor_timestamp / 1e9
+    return frame.timestamp
+
+
+class CameraGroup:
+    """Registry of named cameras sharing one process
+
+    The first camera added is the reference: frame sets are built for each
+    new reference frame by picking the closest-in-time frame of every other
+    camera from its history.
+    """
+
+    def __init__(self, max_skew=0.05):
+        """Initialize the camera group
+
+        Args:
+            max_skew (float): Maximum capture time difference within a frame set in seconds
+        """
+        self.max_skew = max_skew
+        self.cameras = {}
+
+    def add(self, name, camera):
+        """Register a camera
+
+        Args:
+            name (str): Camera name, used in URLs such as /video_feed/<name>
+            camera: RoboEye Camera instance
+
+        Returns:
+            Camera: The registered camera
+        """
+        if name in self.cameras:
+            raise ValueError(f"Camera {name} is already registered")
+        self.cameras[name] = camera
+        return camera
+
+    def get(self, name):
+        """Get a registered camera by name"""
+        return self.cameras[name]
+
+    @property
+    def names(self):
+        """Names of the registered cameras, reference camera first"""
+        return list(self.cameras)
+
+    @property
+    def is_running(self):
+        """Whether all cameras are running"""
+        return bool(self.cameras) and all(camera.is_running for camera in self.cameras.values())
+
+    def start(self):
+        """Start all cameras"""
+        for camera in self.cameras.values():
+            if not camera.is_running:
+                camera.start()
+        return True
+
+    def stop(self):
+        """Stop all cameras"""
+        for camera in self.cameras.values():
+            camera.stop()
+
+    def _align(self, reference, max_skew):
+        """Pair a reference frame with the closest frames of the other cameras
+
+        Returns:
+            dict: {name: Frame}, or None if a camera has no frame within max_skew
+        """
+        names = self.names
+        histories = {}
+        for name in names[1:]:
+            camera = self.cameras[name]
+            with camera.frame_condition:
+                histories[name] = list(camera.frame_history)
+            if not histories[name]:
+                return None
+
+        # Sensor timestamps share one monotonic clock, prefer them when all frames have one
+        sensor_clock = reference.sensor_timestamp is not None and all(
+            frame.sensor_timestamp is not None for history in histories.values() for frame in history
+        )
+        reference_time = _frame_time(reference, sensor_clock)
+
+        frame_set = {names[0]: reference}
+        for name, history in histories.items():
+            closest = min(history, key=lambda frame: abs(_frame_time(frame, sensor_clock) - reference_time))
+            if abs(_frame_time(closest, sensor_clock) - reference_time) > max_skew:
+                return None
+            frame_set[name] = closest
+        return frame_set
+
+    def get_frame_set(self, max_skew=None):
+        """Get time-aligned latest frames of all cameras
+
+        Args:
+            max_skew (float): Maximum capture time difference, group default if None
+
+        Returns:
+            dict: {name: Frame}, or None if the cameras cannot be aligned
+        """
+        if not self.cameras:
+            return None
+        reference = self.cameras[self.names[0]].get_frame()
+        if reference is None:
+            return None
+        return self._align(reference, self.max_skew if max_skew is None else max_skew)
+
+    def wait_for_frame_set(self, after_id=0, timeout=None, consumer=None, max_skew=None):
+        """Block until a new reference frame can be paired with all other cameras
+
+        Cameras that are behind the reference frame are waited for. Reference
+        frames that still cannot be paired are skipped, so free-running
+        cameras do not make the caller spin on the same frame.
+
+        Args:
+            after_id (int): Reference camera frame id the caller already has
+            timeout (float): Maximum time to wait in seconds, forever if None
+            consumer (str): Consumer name for the reference camera statistics,
+                skipped reference frames are counted as skipped
+            max_skew (float): Maximum capture time difference, group default if None
+
+        Returns:
+            dict: {name: Frame}, or None on timeout
+        """
+        if not self.cameras:
+            return None
+        max_skew = self.max_skew if max_skew is None else max_skew
+        reference_camera = self.cameras[self.names[0]]
+        deadline = None if timeout is None else time.time() + timeout
+
+        last_id = after_id
+        while True:
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            reference = reference_camera.wait_for_frame(last_id, remaining)
+            if reference is None:
+                return None
+
+            frame_set = self._wait_align(reference, max_skew, deadline)
+            if frame_set is not None:
+                reference_camera.count_frame(consumer, reference, after_id)
+                return frame_set
+            last_id = reference.id
+
+    def _wait_align(self, reference, max_skew, deadline):
+        """Align a reference frame, waiting for cameras that have not caught up with it
+
+        Returns:
+            dict: {name: Frame}, or None if the frame cannot be paired in time
+        """
+        # A matching frame is published at the latest this long after the reference
+        wait_until = reference.timestamp + max_skew + PUBLISH_DELAY
+        if deadline is not None:
+            wait_until = min(wait_until, deadline)
+
+        while True:
+            frame_set = self._align(reference, max_skew)
+            if frame_set is not None:
+                return frame_set
+
+            lagging = None
+            for name in self.names[1:]:
+                latest = self.cameras[name].get_frame()
+                if latest is None or latest.timestamp < reference.timestamp:
+                    lagging = self.cameras[name]
+                    break
+            remaining = wait_until - time.time()
+            if lagging is None or remaining <= 0:
+                # Every camera is past the reference without a close frame, or out of time
+                return None
+            if lagging.wait_for_frame(lagging.frame_id, remaining) is None:
+                return None
+
+
+class TiledView(Camera):
+    """Composite of all cameras in a group, usable wherever a Camera is expected
+
+    Each frame set is tiled once into one image and published through the
+    regular Camera frame interface, so Display, the streaming server and
+    the recorder can use the composite without extra rendering per client.
+    """
+
+    def __init__(self, group, tile_size=(320, 240), columns=None, labels=True, history_size=8):
+        """Initialize the tiled view
+
+        Args:
+            group (CameraGroup): Cameras to tile
+            tile_size (tuple): Size of each tile (width, height)
+            columns (int): Tiles per row, as square as possible if None
+            labels (bool): Draw camera names on the tiles
+            history_size (int): Number of recent composites kept addressable by id
+        """
+        self.group = group
+        self.tile_size = tuple(tile_size)
+        self.columns = columns
+        self.labels = labels
+        super().__init__(size=self._layout_size(), history_size=history_size)
+
+    def _layout(self):
+        """Tiles per row and number of rows for the current group"""
+        count = max(len(self.group.cameras), 1)
+        columns = self.columns or math.ceil(math.sqrt(count))
+        return columns, math.ceil(count / columns)
+
+    def _layout_size(self):
+        """Composite resolution (width, height) for the current group"""
+        columns, rows = self._layout()
+        return columns * self.tile_size[0], rows * self.tile_size[1]
+
+    def _camera_loop(self):
+        """Compose and publish one tiled frame per frame set"""
+        try:
+            self.camera_size = self._layout_size()
+            self.camera_width, self.camera_height = self.camera_size
+            self.is_running = True
+            self.started_event.set()
+
+            fps_counter = 0
+            fps_timer = time.time()
+            last_id = 0
+            while self.is_running:
+                frame_set = self.group.wait_for_frame_set(last_id, timeout=0.5, consumer='tiled_view')
+                if frame_set is None:
+                    continue
+                last_id = frame_set[self.group.names[0]].id
+                loop_start = time.time()
+
+                fps_counter += 1
+                elapsed_time = time.time() - fps_timer
+                if elapsed_time > 1.0:
+                    self.fps = round(fps_counter / elapsed_time, 1)
+                    fps_counter = 0
+                    fps_timer = time.time()
+
+                self._publish_frame(self._compose(frame_set))
+                self.loop_time = 0.9 * self.loop_time + 0.1 * (time.time() - loop_start)
+
+        except Exception as e:
+            print(f"Tiled view error: {e}")
+            self.is_running = False
+        finally:
+            self.started_event.set()
+            with self.frame_condition:
+                self.frame_condition.notify_all()
+
+    def _tile_origin(self, index):
+        """Top-left corner of a tile in the composite"""
+        columns, _ = self._layout()
+        return (index % columns) * self.tile_size[0], (index // columns) * self.tile_size[1]
+
+    def update_frame_set_detections(self, frame_set, detections):
+        """Publish per-camera detections in composite coordinates
+
+        The tiled view is what /events and the web overlay describe, so
+        detections of the individual cameras are moved and scaled onto
+        their tiles.
+
+        Args:
+            frame_set (dict): {camera name: Frame} the detections were made on
+            detections (dict): {camera name: list of detection dicts}
+        """
+        tile_width, tile_height = self.tile_size
+        tiled = []
+        for index, name in enumerate(self.group.names):
+            frame = frame_set.get(name)
+            if frame is None:
+                continue
+            x, y = self._tile_origin(index)
+            scale_x = tile_width / frame.image.shape[1]
+            scale_y = tile_height / frame.image.shape[0]
+            for detection in detections.get(name, []):
+                x1, y1, x2, y2 = detection['bbox']
+                tiled.append((
+                    int(x + x1 * scale_x), int(y + y1 * scale_y),
+                    int(x + x2 * scale_x), int(y + y2 * scale_y),
+                    detection['confidence'],
+                ))
+        self.update_detections(tiled)
+
+    def _compose(self, frame_set):
+        """Tile the frames of a frame set into one image"""
+        columns, rows = self._layout()
+        tile_width, tile_height = self.tile_size
+        canvas = np.zeros((rows * tile_height, columns * tile_width, 3), dtype=np.uint8)
+
+        for index, name in enumerate(self.group.names):
+            frame = frame_set.get(name)
+            if frame is None:
+                continue
+            image = frame.image
+            if image.ndim == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            x, y = self._tile_origin(index)
+            canvas[y:y + tile_height, x:x + tile_width] = cv2.resize(
+                image[:, :, :3], self.tile_size, interpolation=cv2.INTER_AREA
+            )
+            if self.labels:
+                cv2.putText(canvas, name, (x + 8, y + 20), cv2.FONT_HERSHEY_SIMPLEX,
+                            0.6, (255, 255, 255), 1, cv2.LINE_AA)
+        return canvas
@@ -0,0 +1,297 @@
+"""
+Object detection helpers for RoboEye library
+"""
+
+import cv2
+import numpy as np
+
+# Square input size the detector runs at
+MODEL_SIZE = 416
+
+
+def preprocess(frame, size=MODEL_SIZE):
+    """Resize a frame to the model input size
+
+    Args:
+        frame (numpy.ndarray): Frame at any resolution
+        size (int): Model input size
+
+    Returns:
+        numpy.ndarray: size x size frame
+    """
+    return cv2.resize(frame, (size, size))
+
+
+def _parse_result(result, shape, size):
+    """Convert one model result to detections in original frame coordinates
+
+    Args:
+        result: Ultralytics result for one image
+        shape (tuple): Original frame shape (height, width, ...)
+        size (int): Model input size the result refers to
+
+    Returns:
+        list: Detection dicts with 'bbox', 'center', 'confidence' and 'class_id'
+    """
+    detections = []
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return detections
+
+    # Map coordinates back from the model input size to the original frame
+    scale_x = shape[1] / size
+    scale_y = shape[0] / size
+    xyxy = boxes.xyxy.cpu().numpy()
+    confidences = boxes.conf.cpu().numpy()
+    classes = boxes.cls.cpu().numpy() if boxes.cls is not None else [0] * len(xyxy)
+
+    for (x1, y1, x2, y2), confidence, class_id in zip(xyxy, confidences, classes):
+        orig_x1 = int(x1 * scale_x)
+        orig_y1 = int(y1 * scale_y)
+        orig_x2 = int(x2 * scale_x)
+        orig_y2 = int(y2 * scale_y)
+        detections.append({
+            'bbox': (orig_x1, orig_y1, orig_x2, orig_y2),
+            'center': ((orig_x1 + orig_x2) // 2, (orig_y1 + orig_y2) // 2),
+            'confidence': float(confidence),
+            'class_id': int(class_id),
+        })
+    return detections
+
+
+def detect_preprocessed(model, images, shapes, conf=0.7, size=MODEL_SIZE):
+    """Detect objects in images that are already resized to the model input size
+
+    Args:
+        model: Ultralytics YOLO model
+        images (list): size x size frames
+        shapes (list): Original frame shapes, one per image
+        conf (float): Confidence threshold
+        size (int): Model input size
+
+    Returns:
+        list: One list of detection dicts per image
+    """
+    if not images:
+        return []
+    # Without imgsz the model letterboxes every input to its default 640 px
+    results = model(list(images), verbose=False, conf=conf, imgsz=size)
+    return [_parse_result(result, shape, size) for result, shape in zip(results, shapes)]
+
+
+def detect_batch(model, frames, conf=0.7, size=MODEL_SIZE):
+    """Detect objects in several frames with one model call
+
+    Args:
+        model: Ultralytics YOLO model
+        frames (list): Frames at any resolution
+        conf (float): Confidence threshold
+        size (int): Model input size
+
+    Returns:
+        list: One list of detection dicts per frame
+    """
+    images = [preprocess(frame, size) for frame in frames]
+    return detect_preprocessed(model, images, [frame.shape for frame in frames], conf, size)
+
+
+def detect_objects(model, frame, conf=0.7, size=MODEL_SIZE):
+    """
+    Detect objects using YOLO model
+    Returns: list of detections with coordinates and confidence
+    """
+    return detect_batch(model, [frame], conf, size)[0]
+
+
+def detect_frame_set(model, frame_set, conf=0.7, size=MODEL_SIZE):
+    """Detect objects in a time-aligned frame set with one model call
+
+    Args:
+        model: Ultralytics YOLO model shared by all cameras
+        frame_set (dict): {camera name: Frame} from CameraGroup
+        conf (float): Confidence threshold
+        size (int): Model input size
+
+    Returns:
+        dict: {camera name: list of detection dicts}
+    """
+    names = list(frame_set)
+    results = detect_batch(model, [frame_set[name].image for name in names], conf, size)
+    return dict(zip(names, results))
+
+
+def nms(detections, iou_threshold=0.5):
+    """Remove overlapping detections of the same class, keeping the most confident
+
+    Args:
+        detections (list): Detection dicts in frame coordinates
+        iou_threshold (float): Overlap above which the weaker detection is removed
+
+    Returns:
+        list: Remaining detections, most confident first
+    """
+    if not detections:
+        return []
+
+    boxes = np.array([detection['bbox'] for detection in detections], dtype=np.float32)
+    scores = np.array([detection['confidence'] for detection in detections], dtype=np.float32)
+    classes = np.array([detection.get('class_id', 0) for detection in detections])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+
+        width = np.minimum(boxes[best, 2], boxes[rest, 2]) - np.maximum(boxes[best, 0], boxes[rest, 0])
+        height = np.minimum(boxes[best, 3], boxes[rest, 3]) - np.maximum(boxes[best, 1], boxes[rest, 1])
+        intersection = np.clip(width, 0, None) * np.clip(height, 0, None)
+        iou = intersection / np.maximum(areas[best] + areas[rest] - intersection, 1e-6)
+
+        order = rest[(iou <= iou_threshold) | (classes[rest] != classes[best])]
+    return [detections[i] for i in keep]
+
+
+class RoiDetector:
+    """Detector running full-resolution crops around regions of interest
+
+    Each frame gets a cheap low-resolution pass over the whole frame. Crops
+    at full resolution are then taken around the regions of interest: recent
+    detections, low-confidence proposals from the full-frame pass, and
+    configured zones. All crops go through the model in one batch, and the
+    results are merged back into frame coordinates with NMS.
+
+    Compute per frame is the coarse pass plus one size x size inference per
+    crop: with the defaults (320 px pass, 416 px crops, max_crops=2) that is
+    about 0.6x a single 416 px pass when nothing is of interest and up to
+    about 2.6x with both crops in use. max_crops is the knob for the budget.
+
+    Keeps tracking state between frames, so use one instance per camera
+    from a single thread.
+    """
+
+    def __init__(self, model, conf=0.7, proposal_conf=0.3, size=MODEL_SIZE, coarse_size=320,
+                 zones=(), max_crops=2, margin=0.5, track_frames=5, iou_threshold=0.5):
+        """Initialize the detector
+
+        Args:
+            model: Ultralytics YOLO model
+            conf (float): Confidence threshold of the returned detections
+            proposal_conf (float): Confidence threshold of full-frame detections used as crop regions
+            size (int): Crop size in frame pixels, crops are fed to the model at this size
+            coarse_size (int): Model input size of the full-frame pass
+            zones (list): Fixed regions (x1, y1, x2, y2) always inspected at full resolution
+            max_crops (int): Maximum number of crops per frame, zones count first
+            margin (float): Context added around a region, as a fraction of its size
+            track_frames (int): Frames a detection keeps its crop after it was last seen
+            iou_threshold (float): NMS overlap threshold when merging results
+        """
+        self.model = model
+        self.conf = conf
+        self.proposal_conf = proposal_conf
+        self.size = size
+        self.coarse_size = coarse_size
+        self.zones = [tuple(zone) for zone in zones]
+        self.max_crops = max_crops
+        self.margin = margin
+        self.track_frames = track_frames
+        self.iou_threshold = iou_threshold
+
+        # Tracked regions: [bbox, confidence, frames since last seen]
+        self.tracks = []
+
+    def detect(self, frame):
+        """Detect objects in a frame
+
+        Args:
+            frame (numpy.ndarray): Full-resolution frame
+
+        Returns:
+            list: Detection dicts in frame coordinates
+        """
+        proposals = detect_objects(self.model, frame, self.proposal_conf, self.coarse_size)
+
+        windows = self._crop_windows(frame.shape, proposals)
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in windows]
+        results = detect_batch(self.model, crops, self.conf, self.size)
+
+        merged = [detection for detection in proposals if detection['confidence'] >= self.conf]
+        for (x1, y1, _, _), detections in zip(windows, results):
+            for detection in detections:
+                merged.append(_offset(detection, x1, y1))
+
+        detections = nms(merged, self.iou_threshold)
+        self._update_tracks(detections)
+        return detections
+
+    def _crop_windows(self, shape, proposals):
+        """Choose the crop windows for this frame
+
+        Returns:
+            list: Windows (x1, y1, x2, y2) in frame coordinates
+        """
+        regions = list(self.zones)
+        candidates = [(track[1], track[0]) for track in self.tracks]
+        candidates += [(detection['confidence'], detection['bbox']) for detection in proposals]
+        regions += [bbox for _, bbox in sorted(candidates, key=lambda item: -item[0])]
+
+        windows = []
+        for region in regions:
+            if len(windows) >= self.max_crops:
+                break
+            window = self._window(shape, region)
+            # Skip regions already inside a chosen window
+            if any(_contains(other, region) for other in windows):
+                continue
+            windows.append(window)
+        return windows
+
+    def _window(self, shape, region):
+        """Square crop around a region with margin, at least the crop size and inside the frame"""
+        height, width = shape[:2]
+        x1, y1, x2, y2 = region
+        side = max((x2 - x1), (y2 - y1)) * (1 + self.margin)
+        side = int(min(max(side, self.size), width, height))
+
+        cx = (x1 + x2) / 2
+        cy = (y1 + y2) / 2
+        left = int(min(max(cx - side / 2, 0), width - side))
+        top = int(min(max(cy - side / 2, 0), height - side))
+        return left, top, left + side, top + side
+
+    def _update_tracks(self, detections):
+        """Age existing tracks and refresh them with the new detections"""
+        tracks = []
+        for bbox, confidence, age in self.tracks:
+            if age + 1 < self.track_frames and not any(_iou(bbox, d['bbox']) > 0.3 for d in detections):
+                tracks.append([bbox, confidence, age + 1])
+        tracks += [[detection['bbox'], detection['confidence'], 0] for detection in detections]
+        self.tracks = tracks
+
+
+def _offset(detection, dx, dy):
+    """Move a detection from crop to frame coordinates"""
+    x1, y1, x2, y2 = detection['bbox']
+    bbox = (x1 + dx, y1 + dy, x2 + dx, y2 + dy)
+    moved = dict(detection)
+    moved['bbox'] = bbox
+    moved['center'] = ((bbox[0] + bbox[2]) // 2, (bbox[1] + bbox[3]) // 2)
+    return moved
+
+
+def _contains(window, region):
+    """Whether a region lies completely inside a window"""
+    return window[0] <= region[0] and window[1] <= region[1] and window[2] >= region[2] and window[3] >= region[3]
+
+
+def _iou(a, b):
+    """Intersection over union of two boxes"""
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
@@ -4,6 +4,7 @@ Display functionality for RoboEye library
 
 import os
 import cv2
+import numpy as np
 import threading
 import time
 from streaming import create_streaming_server, start_streaming_server
@@ -13,34 +14,53 @@ from utils import get_ip_addresses
 class Display:
     """Display class for showing camera output"""
 
-    def __init__(self, camera):
+    def __init__(self, camera, recorder=None, profiler=None, cameras=None):
         """Initialize the display with a camera instance
 
         Args:
-            camera: RoboEye Camera instance
+            camera: RoboEye Camera instance, or a TiledView for several cameras
+            recorder: Optional RoboEye Recorder exposed on the web server
+            profiler: Optional SamplingProfiler exposed on the web server
+            cameras: Optional CameraGroup streamed per camera on the web server
         """
         self.camera = camera
+        self.cameras = cameras
+        self.recorder = recorder
+        self.profiler = profiler
         self.window_name = "RoboEye"
 
         # Display state
         self.local_display_enabled = False
         self.local_display_thread = None
 
+        # Local preview settings and statistics
+        self.max_fps = 15
+        self.preview_size = None
+        self.preview_buffer = None
+        self.frames_displayed = 0
+        self.frames_dropped = 0
+
         # Web streaming
         self.web_enabled = False
         self.web_server = None
         self.streaming_thread = None
         self.port = 9000
 
-    def show_local(self, enable=True, window_name=None):
+    def show_local(self, enable=True, window_name=None, max_fps=None, preview_size=None):
         """Enable or disable local display using OpenCV window
 
         Args:
             enable (bool): Whether to enable local display
             window_name (str): Name for the display window
+            max_fps (float): Maximum preview frame rate
+            preview_size (tuple): Preview resolution (width, height), full frame if None
         """
         if window_name:
             self.window_name = window_name
+        if max_fps:
+            self.max_fps = max_fps
+        if preview_size:
+            self.preview_size = tuple(preview_size)
 
         # Check if display is available
         if enable and 'DISPLAY' not in os.environ:
@@ -61,28 +81,73 @@ class Display:
         return True
 
     def _local_display_loop(self):
-        """Loop for showing frames in local window"""
+        """Loop for showing frames in local window, driven by new frames"""
+        # The preview must not compete with control and inference threads
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+
+        last_id = 0
+        next_time = 0
         while self.local_display_enabled and self.camera.is_running:
-            if self.camera.current_frame is not None:
-                try:
-                    cv2.imshow(self.window_name, self.camera.current_frame)
-                    key = cv2.waitKey(1) & 0xFF
-
-                    # Check if window was closed
-                    if cv2.getWindowProperty(self.window_name, cv2.WND_PROP_VISIBLE) < 1:
-                        self.local_display_enabled = False
-                        break
-
-                except Exception as e:
-                    print(f"Display error: {e}")
+            try:
+                frame = self.camera.wait_for_frame(last_id, timeout=0.1, consumer='display')
+                if frame is None:
+                    # Keep the window responsive while no frames arrive
+                    cv2.waitKey(1)
+                    continue
+
+                # Wait out the rest of the frame interval, then show the newest frame
+                delay = next_time - time.time()
+                if delay > 0:
+                    cv2.waitKey(max(1, int(delay * 1000)))
+                    frame = self.camera.get_frame() or frame
+                next_time = time.time() + 1.0 / self.max_fps
+
+                if last_id:
+                    self.frames_dropped += max(frame.id - last_id - 1, 0)
+                last_id = frame.id
+
+                cv2.imshow(self.window_name, self._preview(frame.image))
+                self.frames_displayed += 1
+                key = cv2.waitKey(1) & 0xFF
+
+                # Check if window was closed
+                if cv2.getWindowProperty(self.window_name, cv2.WND_PROP_VISIBLE) < 1:
                     self.local_display_enabled = False
                     break
 
-            time.sleep(0.03)  # ~30fps
+            except Exception as e:
+                print(f"Display error: {e}")
+                self.local_display_enabled = False
+                break
 
         # Cleanup
         cv2.destroyWindow(self.window_name)
 
+    def _preview(self, image):
+        """Downscale a frame to the preview size, reusing the output buffer"""
+        if not self.preview_size or self.preview_size == (image.shape[1], image.shape[0]):
+            return image
+
+        shape = (self.preview_size[1], self.preview_size[0]) + image.shape[2:]
+        if self.preview_buffer is None or self.preview_buffer.shape != shape or self.preview_buffer.dtype != image.dtype:
+            self.preview_buffer = np.empty(shape, dtype=image.dtype)
+        cv2.resize(image, self.preview_size, dst=self.preview_buffer, interpolation=cv2.INTER_AREA)
+        return self.preview_buffer
+
+    def get_stats(self):
+        """Get local display statistics
+
+        Returns:
+            dict: Frames displayed and frames dropped by the local preview
+        """
+        return {
+            'displayed': self.frames_displayed,
+            'dropped': self.frames_dropped,
+        }
+
     def show_web(self, enable=True, port=9000):
         """Enable or disable web streaming
 
@@ -100,7 +165,12 @@ class Display:
         if enable:
             # Create web server if needed
             if self.web_server is None:
-                self.web_server = create_streaming_server(self.camera)
+                self.web_server = create_streaming_server(
+                    self.camera,
+                    recorder=self.recorder,
+                    profiler=self.profiler,
+                    cameras=self.cameras
+                )
 
             # Start streaming thread
             if self.streaming_thread is None or not self.streaming_thread.is_alive():
@@ -0,0 +1,247 @@
+"""
+Load-adaptive frame rate and resolution governor for RoboEye library
+"""
+
+import time
+import threading
+from collections import deque
+from utils import get_cpu_temperature, get_cpu_times, get_cpu_load
+
+
+class Governor:
+    """Governor class to degrade and restore capture settings under load
+
+    Overload is detected from consumer frame skipping, capture loop time,
+    delivered FPS, CPU load and SoC temperature. The governor first lowers
+    the capture frame rate and then the stream resolution, and restores them
+    in reverse order once all metrics are back below their recovery levels.
+    """
+
+    def __init__(self, camera, min_fps=5, max_fps=None, fps_step=5,
+                 stream_scales=(1.0, 0.75, 0.5),
+                 max_skip_ratio=0.3, recover_skip_ratio=0.1,
+                 max_loop_load=0.8, recover_loop_load=0.5,
+                 max_cpu_load=0.9, recover_cpu_load=0.6,
+                 max_temperature=75, recover_temperature=65,
+                 interval=2.0, down_after=2, up_after=5,
+                 consumers=('controller', 'pipeline', 'recorder')):
+        """Initialize the governor with a camera instance
+
+        Args:
+            camera: RoboEye Camera instance
+            min_fps (float): Lowest capture frame rate
+            max_fps (float): Highest capture frame rate, camera frame rate if None
+            fps_step (float): Frame rate change per decision
+            stream_scales (tuple): Stream resolutions as fractions of the capture resolution,
+                from best to lowest, the first level streams at capture resolution
+            max_skip_ratio (float): Fraction of frames skipped by a consumer that counts as overload
+            recover_skip_ratio (float): Skip fraction below which a consumer keeps up
+            max_loop_load (float): Fraction of the frame period spent in the capture loop that counts as overload
+            recover_loop_load (float): Capture loop fraction below which it keeps up
+            max_cpu_load (float): CPU utilisation since the last check that counts as overload
+            recover_cpu_load (float): CPU utilisation below which the CPU keeps up
+            max_temperature (float): SoC temperature that counts as overload
+            recover_temperature (float): SoC temperature below which the SoC is cool
+            interval (float): Seconds between checks
+            down_after (int): Consecutive overloaded checks before degrading
+            up_after (int): Consecutive healthy checks before restoring
+            consumers (tuple): Latency-critical consumers whose frame skipping counts as
+                overload. Best-effort readers such as 'display' and 'web_stream' skip
+                frames by design and are ignored, all consumers are watched if None
+        """
+        self.camera = camera
+        self.min_fps = min_fps
+        self.max_fps = max_fps or camera.frame_rate
+        self.fps_step = fps_step
+        self.stream_scales = list(stream_scales)
+        self.max_skip_ratio = max_skip_ratio
+        self.recover_skip_ratio = recover_skip_ratio
+        self.max_loop_load = max_loop_load
+        self.recover_loop_load = recover_loop_load
+        self.max_cpu_load = max_cpu_load
+        self.recover_cpu_load = recover_cpu_load
+        self.max_temperature = max_temperature
+        self.recover_temperature = recover_temperature
+        self.interval = interval
+        self.down_after = down_after
+        self.up_after = up_after
+        self.consumers = set(consumers) if consumers is not None else None
+
+        # Governor state
+        self.is_running = False
+        self.governor_thread = None
+        self.size_index = 0
+        self.overloaded_checks = 0
+        self.healthy_checks = 0
+        self.last_consumer_stats = {}
+        self.last_cpu_times = None
+        self.metrics = {}
+
+        # Recent decisions, newest last
+        self.decisions = deque(maxlen=100)
+
+    def start(self):
+        """Start the governor in a separate thread"""
+        if self.is_running:
+            print("Governor is already running")
+            return
+
+        self.last_consumer_stats = self.camera.get_consumer_stats()
+        self.last_cpu_times = get_cpu_times()
+        self.is_running = True
+        self.governor_thread = threading.Thread(target=self._governor_loop, daemon=True)
+        self.governor_thread.start()
+        return True
+
+    def stop(self):
+        """Stop the governor, leaving the current settings in place"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        if self.governor_thread:
+            self.governor_thread.join(timeout=self.interval + 1)
+            self.governor_thread = None
+
+    def stats(self):
+        """Get the latest metrics and current settings
+
+        Returns:
+            dict: Metrics, frame rate, stream size and recent decisions
+        """
+        return {
+            'metrics': dict(self.metrics),
+            'frame_rate': self.camera.frame_rate,
+            'stream_size': self.camera.stream_size,
+            'decisions': list(self.decisions),
+        }
+
+    def _governor_loop(self):
+        """Main governor loop running in separate thread"""
+        while self.is_running:
+            time.sleep(self.interval)
+            if not self.camera.is_running:
+                continue
+            try:
+                self._check()
+            except Exception as e:
+                print(f"Governor error: {e}")
+
+    def _skip_ratio(self):
+        """Worst fraction of frames skipped by a watched consumer since the last check"""
+        stats = self.camera.get_consumer_stats()
+        worst = 0.0
+        for name, current in stats.items():
+            if self.consumers is not None and name not in self.consumers:
+                continue
+            previous = self.last_consumer_stats.get(name, {'frames': 0, 'skipped': 0})
+            frames = current['frames'] - previous['frames']
+            skipped = current['skipped'] - previous['skipped']
+            if frames + skipped > 0:
+                worst = max(worst, skipped / (frames + skipped))
+        self.last_consumer_stats = stats
+        return worst
+
+    def _cpu_load(self):
+        """CPU utilisation since the last check"""
+        cpu_times = get_cpu_times()
+        load = get_cpu_load(self.last_cpu_times, cpu_times)
+        self.last_cpu_times = cpu_times
+        return round(load, 3) if load is not None else None
+
+    def _check(self):
+        """Collect metrics and take a decision"""
+        frame_rate = self.camera.frame_rate
+        self.metrics = {
+            'skip_ratio': round(self._skip_ratio(), 3),
+            'loop_load': round(self.camera.loop_time * frame_rate, 3),
+            'fps_ratio': round(self.camera.fps / frame_rate, 3) if frame_rate else 1.0,
+            'cpu_load': self._cpu_load(),
+            'temperature': get_cpu_temperature(),
+        }
+        metrics = self.metrics
+
+        # Keep a degraded stream size in proportion after reconfigure() changes the capture resolution
+        if self.size_index and self.camera.stream_size != self._stream_size(self.size_index):
+            self.camera.set_stream_size(self._stream_size(self.size_index))
+
+        reasons = []
+        if metrics['skip_ratio'] > self.max_skip_ratio:
+            reasons.append('consumers skipping frames')
+        if metrics['loop_load'] > self.max_loop_load:
+            reasons.append('capture loop too slow')
+        if metrics['fps_ratio'] < 0.8:
+            reasons.append('frame rate below target')
+        if metrics['cpu_load'] is not None and metrics['cpu_load'] > self.max_cpu_load:
+            reasons.append('CPU overloaded')
+        if metrics['temperature'] is not None and metrics['temperature'] > self.max_temperature:
+            reasons.append('SoC too hot')
+
+        healthy = (
+            not reasons
+            and metrics['skip_ratio'] <= self.recover_skip_ratio
+            and metrics['loop_load'] <= self.recover_loop_load
+            and (metrics['cpu_load'] is None or metrics['cpu_load'] <= self.recover_cpu_load)
+            and (metrics['temperature'] is None or metrics['temperature'] <= self.recover_temperature)
+        )
+
+        # Hysteresis: act only after several consecutive checks agree
+        if reasons:
+            self.overloaded_checks += 1
+            self.healthy_checks = 0
+            if self.overloaded_checks >= self.down_after:
+                self.overloaded_checks = 0
+                self._degrade(', '.join(reasons))
+        elif healthy:
+            self.healthy_checks += 1
+            self.overloaded_checks = 0
+            if self.healthy_checks >= self.up_after:
+                self.healthy_checks = 0
+                self._restore()
+        else:
+            self.overloaded_checks = 0
+            self.healthy_checks = 0
+
+    def _degrade(self, reason):
+        """Lower the frame rate, then the stream resolution"""
+        frame_rate = self.camera.frame_rate
+        if frame_rate > self.min_fps:
+            self._apply(max(frame_rate - self.fps_step, self.min_fps), self.size_index, reason)
+        elif self.size_index < len(self.stream_scales) - 1:
+            self._apply(frame_rate, self.size_index + 1, reason)
+
+    def _restore(self):
+        """Raise the stream resolution, then the frame rate"""
+        frame_rate = self.camera.frame_rate
+        if self.size_index > 0:
+            self._apply(frame_rate, self.size_index - 1, 'load recovered')
+        elif frame_rate < self.max_fps:
+            self._apply(min(frame_rate + self.fps_step, self.max_fps), self.size_index, 'load recovered')
+
+    def _stream_size(self, size_index):
+        """Stream resolution of a level, None for the capture resolution"""
+        scale = self.stream_scales[size_index]
+        if size_index == 0 and scale >= 1.0:
+            return None
+        width, height = self.camera.camera_size
+        # Even dimensions keep JPEG chroma subsampling aligned
+        return max(int(width * scale) // 2 * 2, 2), max(int(height * scale) // 2 * 2, 2)
+
+    def _apply(self, frame_rate, size_index, reason):
+        """Apply new settings and log the decision"""
+        if frame_rate != self.camera.frame_rate:
+            self.camera.set_frame_rate(frame_rate)
+        if size_index != self.size_index:
+            self.size_index = size_index
+            self.camera.set_stream_size(self._stream_size(size_index))
+
+        decision = {
+            'time': time.time(),
+            'reason': reason,
+            'frame_rate': frame_rate,
+            'stream_size': self.camera.stream_size,
+            'metrics': dict(self.metrics),
+        }
+        self.decisions.append(decision)
+        print(f"Governor: {reason} -> {frame_rate} FPS, stream size "
+              f"{self.camera.stream_size or 'full'} ({self.metrics})")
@@ -0,0 +1,106 @@
+"""
+Line position estimation for RoboEye library
+"""
+
+import numpy as np
+
+# BGR weights for luma, matching the channel order of the RGB888 frames
+GRAY_WEIGHTS = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+
+class LineEstimator:
+    """Estimate line position and heading from a band of frame rows
+
+    Each sampled row is reduced to an intensity-weighted centroid in one
+    vectorized pass, and a straight line is fitted through the centroids.
+    """
+
+    def __init__(self, band=(0.4, 0.9), rows=16, column_step=4, dark_line=True, min_contrast=30):
+        """Initialize the estimator
+
+        Args:
+            band (tuple): Top and bottom of the sampled band as fractions of the frame height
+            rows (int): Number of rows sampled in the band
+            column_step (int): Horizontal downscale factor, every n-th pixel is used
+            dark_line (bool): Whether the line is darker than the floor
+            min_contrast (float): Minimum intensity range for a row to count as seeing the line
+        """
+        self.band = band
+        self.rows = rows
+        self.column_step = column_step
+        self.dark_line = dark_line
+        self.min_contrast = min_contrast
+
+        # Cached sampling grid, rebuilt when the frame size changes
+        self.frame_shape = None
+        self.row_index = None
+        self.columns = None
+
+        # Last estimate
+        self.position = 0.0
+        self.heading = 0.0
+        self.found = False
+
+    def _prepare(self, shape):
+        """Build the row indices and normalized column coordinates for a frame size"""
+        height, width = shape[:2]
+        top = int(self.band[0] * (height - 1))
+        bottom = int(self.band[1] * (height - 1))
+        self.row_index = np.unique(np.linspace(top, bottom, self.rows).astype(np.intp))
+
+        # Column coordinates in [-1, 1], 0 is the image center
+        sampled = np.arange(0, width, self.column_step, dtype=np.float32)
+        self.columns = (sampled - (width - 1) / 2) / ((width - 1) / 2)
+        self.frame_shape = shape
+
+    def estimate(self, frame):
+        """Estimate the line from a frame
+
+        Args:
+            frame (numpy.ndarray): BGR or grayscale frame
+
+        Returns:
+            tuple: (position, heading, found)
+                position: Line offset at the bottom of the band, -1 (left) to 1 (right)
+                heading: Line angle in radians, positive when the line leans right further ahead
+                found: Whether enough rows saw the line, otherwise the last estimate is kept
+        """
+        if frame.shape != self.frame_shape:
+            self._prepare(frame.shape)
+
+        band = frame[self.row_index, ::self.column_step]
+        if band.ndim == 3:
+            intensity = band.astype(np.float32) @ GRAY_WEIGHTS
+        else:
+            intensity = band.astype(np.float32)
+
+        # Weight each pixel by how much it stands out from the row background
+        if self.dark_line:
+            weights = intensity.max(axis=1, keepdims=True) - intensity
+        else:
+            weights = intensity - intensity.min(axis=1, keepdims=True)
+        contrast = weights.max(axis=1)
+        weights -= contrast[:, None] * 0.5
+        np.maximum(weights, 0, out=weights)
+
+        total = weights.sum(axis=1)
+        valid = (contrast >= self.min_contrast) & (total > 0)
+        if np.count_nonzero(valid) < 2:
+            self.found = False
+            return self.position, self.heading, self.found
+
+        centroids = (weights[valid] @ self.columns) / total[valid]
+
+        # Fit x = slope * y + offset through the row centroids, y in normalized rows
+        width = frame.shape[1]
+        y = (self.row_index[valid] - self.row_index[-1]) / ((width - 1) / 2)
+        y_mean = y.mean()
+        x_mean = centroids.mean()
+        dy = y - y_mean
+        slope = float(dy @ (centroids - x_mean)) / float(dy @ dy)
+        offset = x_mean - slope * y_mean
+
+        self.position = float(np.clip(offset, -1.0, 1.0))
+        self.heading = float(np.arctan(-slope))
+        self.found = True
+        return self.position, self.heading, self.found
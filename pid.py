@@ -7,22 +7,28 @@ Example usage of the RoboEye library
 from picarx import Picarx
 from camera import Camera
 from display import Display
-from pygame import time
+from telemetry import TelemetryLog, LatencyTracker
+from line import LineEstimator
 from pygame import mixer
 from robot_hat import PWM, Music, Buzzer, set_volume, enable_speaker, disable_speaker
 import os
-import numpy as np
+from datetime import datetime
 
 
 STEERING_MIN = -35
 STEERING_MAX = 35
 
+# Scale from the normalized line estimate (-1..1) to controller error units
+ERROR_SCALE = 50
+# How strongly the line heading anticipates upcoming curves
+HEADING_GAIN = 0.5
 
 
 
-def update_steering(controller, left_sensor, right_sensor, dt):
+
+def update_steering(controller, position, heading, dt):
     # Positive error = line more to the right (so we need to steer left)
-    error = left_sensor - right_sensor
+    error = (position + HEADING_GAIN * heading) * ERROR_SCALE
 
     correction = controller.compute(error, dt)
 
@@ -41,6 +47,11 @@ class PIDController:
         self.prev_error = 0
         self.integral = 0
 
+        # Terms of the last output, kept for telemetry
+        self.p_term = 0
+        self.i_term = 0
+        self.d_term = 0
+
     def compute(self, error, dt):
         self.integral += error * dt
         # Optional: Clamp the integral to avoid wind-up
@@ -48,11 +59,10 @@ class PIDController:
 
         derivative = (error - self.prev_error) / dt if dt > 0 else 0
 
-        output = (
-            self.kp * error +
-            self.ki * self.integral +
-            self.kd * derivative
-        )
+        self.p_term = self.kp * error
+        self.i_term = self.ki * self.integral
+        self.d_term = self.kd * derivative
+        output = self.p_term + self.i_term + self.d_term
 
         self.prev_error = error
         return output
@@ -77,14 +87,18 @@ def main():
     # mixer.music.load("californication.mp3")
     # mixer.music.play()
     # pop.play()
-    clock = time.Clock()
-    FPS = 10
+    # Expected camera frame rate, used for the first control step
+    FPS = 15
 
 
 
 
     timer = 0
 
+    # Per-tick controller record, analyzed later with telemetry.load_telemetry()
+    telemetry = TelemetryLog(datetime.now().strftime('telemetry/pid_%Y%m%d_%H%M%S.bin'))
+    latency_tracker = LatencyTracker()
+
     try:
         # Initialize camera (with optional parameters)
         camera = Camera(
@@ -113,30 +127,50 @@ def main():
         image_idx = 0
         px.set_cam_tilt_angle(0)
         px.set_cam_pan_angle(0)
-        photo = []
+        line = LineEstimator()
         px.set_cam_tilt_angle(-30)
         px.forward(50)
+        last_id = 0
+        last_time = None
         while True:
-            
+            # Run the control loop once per captured frame
+            frame = camera.wait_for_frame(last_id, timeout=1.0, consumer='controller')
+            if frame is None:
+                continue
+            last_id = frame.id
+
             if timer > 10:
-                camera.take_photo(f"stop_dataset_photo{image_idx}")
-                photo = camera.get_image()
-                row = photo[240]
-                left = round(np.average(row[:len(row)//2]))
-                right = round(np.average(row[len(row)//2:]))
-                dt = 1/FPS
-                steering = update_steering(pid, left, right, dt)
+                position, heading, found = line.estimate(frame.image)
+                dt = frame.timestamp - last_time if last_time else 1/FPS
+                last_time = frame.timestamp
+                steering = update_steering(pid, position, heading, dt)
                 px.set_dir_servo_angle(steering)
-                print(steering)
-                pass
+
+                # Time from the sensor producing the frame to the servo command
+                latency = frame.age()
+                latency_tracker.record(latency)
+
+                camera.update_telemetry(
+                    steering=round(steering, 2),
+                    position=round(position, 3),
+                    heading=round(heading, 3),
+                    line_found=found,
+                    latency_ms=round(1000 * latency, 1)
+                )
+                telemetry.write(
+                    frame_id=frame.id,
+                    sensors=(position, heading),
+                    error=pid.prev_error,
+                    p_term=pid.p_term,
+                    i_term=pid.i_term,
+                    d_term=pid.d_term,
+                    steering=steering,
+                    latency=latency
+                )
+                camera.take_photo(f"stop_dataset_photo{image_idx}")
                 
             else:
                 timer += 1
-                    
-
-            
-            
-            clock.tick(FPS)
 
         print("Cleaning up...")
         disable_speaker()
@@ -149,7 +183,9 @@ def main():
         print(f"Error: {e}")
     finally:
         # Ensure cleanup
+        print(f"Glass-to-servo latency: {latency_tracker.stats()}")
         camera.stop()
+        telemetry.close()
         disable_speaker()
 
 
@@ -0,0 +1,264 @@
+"""
+Composable frame pipeline for RoboEye library
+"""
+
+import time
+import queue
+import threading
+
+# Queue policies when a stage falls behind
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+
+
+class Stage:
+    """A named processing step with its own workers and bounded input queue"""
+
+    def __init__(self, name, func, workers=1, queue_size=2, policy=DROP_OLDEST, copy_frame=False):
+        """Initialize the stage
+
+        Args:
+            name (str): Stage name used in statistics
+            func (callable): func(item) -> item, or None to drop the item
+            workers (int): Number of worker threads
+            queue_size (int): Capacity of the input queue
+            policy (str): DROP_OLDEST to discard the oldest queued item when full,
+                BLOCK to make the previous stage wait
+            copy_frame (bool): Give func its own copy of item['frame'] to draw on
+        """
+        if policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown queue policy: {policy}")
+
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.policy = policy
+        self.copy_frame = copy_frame
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.outputs = []
+        self.threads = []
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def put(self, item, is_running):
+        """Queue an item according to the stage policy
+
+        Args:
+            item (dict): Pipeline item
+            is_running (callable): Returns False once the pipeline stops
+        """
+        if self.policy == BLOCK:
+            while is_running():
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            return
+
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    with self.lock:
+                        self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def run(self, is_running):
+        """Worker loop: take items, process them and pass results on"""
+        while is_running():
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            start = time.perf_counter()
+            try:
+                if self.copy_frame:
+                    item['frame'] = item['frame'].copy()
+                result = self.func(item)
+            except Exception as e:
+                print(f"Pipeline stage {self.name} error: {e}")
+                with self.lock:
+                    self.errors += 1
+                continue
+            elapsed = time.perf_counter() - start
+
+            with self.lock:
+                self.processed += 1
+                self.total_time += elapsed
+                self.max_time = max(self.max_time, elapsed)
+
+            if result is None:
+                continue
+            result.setdefault('timings', {})[self.name] = elapsed
+            for output in self.outputs:
+                output.put(dict(result) if len(self.outputs) > 1 else result, is_running)
+
+    def stats(self):
+        """Get stage statistics
+
+        Returns:
+            dict: Processed, dropped and error counts, timings in milliseconds and queue depth
+        """
+        with self.lock:
+            return {
+                'workers': self.workers,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'queued': self.queue.qsize(),
+                'avg_ms': round(1000 * self.total_time / self.processed, 2) if self.processed else 0.0,
+                'max_ms': round(1000 * self.max_time, 2),
+            }
+
+
+class Pipeline:
+    """Pipeline class feeding camera frames through stages into sinks
+
+    Frames flow through the stages in the order they were added and the
+    output of the last stage is fanned out to every sink. Items are dicts
+    with 'frame_id', 'timestamp', 'frame' (the image) and 'capture' (the
+    Frame record with sensor metadata) keys that stages may extend.
+    Stages with more than one worker may reorder items.
+
+    item['frame'] is the camera's own image, shared with the frame history,
+    the web stream, snapshots and the recorder. Stages must not modify it in
+    place; a stage that draws on it (e.g. 'annotate') is added with
+    copy_frame=True and passes its copy on to the following stages.
+    """
+
+    def __init__(self, camera):
+        """Initialize the pipeline with a camera instance
+
+        Args:
+            camera: RoboEye Camera instance used as the source
+        """
+        self.camera = camera
+        self.stages = []
+        self.sinks = []
+
+        # Pipeline state
+        self.is_running = False
+        self.source_thread = None
+        self.frames_in = 0
+
+    def add_stage(self, name, func, workers=1, queue_size=2, policy=DROP_OLDEST, copy_frame=False):
+        """Append a processing stage
+
+        Args:
+            name (str): Stage name, e.g. 'preprocess', 'detect', 'annotate'
+            func (callable): func(item) -> item, or None to drop the item
+            workers (int): Number of worker threads
+            queue_size (int): Capacity of the input queue
+            policy (str): DROP_OLDEST or BLOCK
+            copy_frame (bool): Copy item['frame'] before func, required if func modifies it in place
+
+        Returns:
+            Pipeline: self, so calls can be chained
+        """
+        self._check_stopped()
+        self.stages.append(Stage(name, func, workers, queue_size, policy, copy_frame))
+        return self
+
+    def add_sink(self, name, func, workers=1, queue_size=2, policy=DROP_OLDEST):
+        """Add a sink receiving the output of the last stage
+
+        Args:
+            name (str): Sink name, e.g. 'display', 'controller'
+            func (callable): func(item), the return value is ignored
+            workers (int): Number of worker threads
+            queue_size (int): Capacity of the input queue
+            policy (str): DROP_OLDEST or BLOCK
+
+        Returns:
+            Pipeline: self, so calls can be chained
+        """
+        self._check_stopped()
+
+        def sink(item):
+            func(item)
+            return None
+
+        self.sinks.append(Stage(name, sink, workers, queue_size, policy))
+        return self
+
+    def _check_stopped(self):
+        if self.is_running:
+            raise RuntimeError("Cannot change a running pipeline")
+
+    def start(self):
+        """Start the source and all stage workers"""
+        if self.is_running:
+            print("Pipeline is already running")
+            return
+
+        # Wire every stage to the next, and the last one to all sinks
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.outputs = [next_stage]
+        if self.stages:
+            self.stages[-1].outputs = list(self.sinks)
+
+        self.is_running = True
+        running = lambda: self.is_running
+        for stage in self.stages + self.sinks:
+            stage.threads = [
+                threading.Thread(target=stage.run, args=(running,), name=f"pipeline-{stage.name}-{i}", daemon=True)
+                for i in range(stage.workers)
+            ]
+            for thread in stage.threads:
+                thread.start()
+
+        self.source_thread = threading.Thread(target=self._source_loop, name="pipeline-source", daemon=True)
+        self.source_thread.start()
+        return True
+
+    def stop(self):
+        """Stop the source and all stage workers"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        threads = [self.source_thread] + [t for stage in self.stages + self.sinks for t in stage.threads]
+        for thread in threads:
+            if thread:
+                thread.join(timeout=1)
+        self.source_thread = None
+
+    def _source_loop(self):
+        """Feed new camera frames into the first stage"""
+        targets = self.stages[:1] or self.sinks
+        last_id = 0
+        running = lambda: self.is_running
+        while self.is_running:
+            frame = self.camera.wait_for_frame(last_id, timeout=0.5, consumer='pipeline')
+            if frame is None:
+                continue
+            last_id = frame.id
+            self.frames_in += 1
+
+            item = {'frame_id': frame.id, 'timestamp': frame.timestamp, 'frame': frame.image, 'capture': frame}
+            for target in targets:
+                target.put(dict(item), running)
+
+    def stats(self):
+        """Get per-stage statistics
+
+        Returns:
+            dict: {'frames_in': int, 'stages': {name: stats}, 'sinks': {name: stats}}
+        """
+        return {
+            'frames_in': self.frames_in,
+            'stages': {stage.name: stage.stats() for stage in self.stages},
+            'sinks': {sink.name: sink.stats() for sink in self.sinks},
+        }
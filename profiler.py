@@ -0,0 +1,261 @@
+"""
+Sampling profiler for the running RoboEye process
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import signal
+import threading
+import tracemalloc
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Profiler class sampling the stacks of all threads at a fixed interval
+
+    Sampling runs on its own thread and only while started, so an idle
+    profiler costs nothing. Results are available as collapsed stacks
+    (flamegraph.pl / speedscope import) or as a speedscope JSON document,
+    with the thread name as the root of every stack.
+    """
+
+    def __init__(self, interval=0.01, max_depth=64):
+        """Initialize the profiler
+
+        Args:
+            interval (float): Seconds between samples
+            max_depth (int): Maximum number of frames recorded per stack
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+
+        # Profiler state
+        self.is_running = False
+        self.profiler_thread = None
+        self.lock = threading.Lock()
+
+        # Samples keyed by (thread name, stack of (function, file, line) from the root)
+        self.samples = Counter()
+        self.sample_count = 0
+        self.started_at = None
+        self.duration = 0.0
+
+    def start(self, interval=None):
+        """Start sampling, discarding previous results
+
+        Args:
+            interval (float): Seconds between samples, keeps the current interval if None,
+                ValueError if it is not finite and positive
+        """
+        if interval is not None and not (math.isfinite(interval) and interval > 0):
+            raise ValueError(f"Invalid sampling interval: {interval}")
+
+        if self.is_running:
+            print("Profiler is already running")
+            return
+
+        if interval is not None:
+            self.interval = interval
+        self.reset()
+        self.is_running = True
+        self.started_at = time.time()
+        self.profiler_thread = threading.Thread(target=self._profiler_loop, name="roboeye-profiler", daemon=True)
+        self.profiler_thread.start()
+        return True
+
+    def stop(self):
+        """Stop sampling, keeping the results"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        if self.profiler_thread:
+            self.profiler_thread.join(timeout=1)
+            self.profiler_thread = None
+        self.duration = time.time() - self.started_at
+
+    def reset(self):
+        """Discard all samples"""
+        with self.lock:
+            self.samples.clear()
+            self.sample_count = 0
+            self.duration = 0.0
+
+    def _profiler_loop(self):
+        """Main sampling loop running in separate thread"""
+        own_ident = threading.get_ident()
+        while self.is_running:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                stack.reverse()
+                stacks.append((names.get(ident, f"thread-{ident}"), tuple(stack)))
+
+            with self.lock:
+                self.samples.update(stacks)
+                self.sample_count += 1
+
+            time.sleep(self.interval)
+
+    def status(self):
+        """Get profiler status
+
+        Returns:
+            dict: Whether sampling is running, interval, sample count and duration
+        """
+        duration = time.time() - self.started_at if self.is_running else self.duration
+        return {
+            'running': self.is_running,
+            'interval': self.interval,
+            'samples': self.sample_count,
+            'duration': round(duration, 2),
+        }
+
+    def collapsed(self):
+        """Get the samples in collapsed-stack format
+
+        Returns:
+            str: One 'thread;frame;...;frame count' line per unique stack
+        """
+        with self.lock:
+            samples = list(self.samples.items())
+
+        lines = []
+        for (thread_name, stack), count in sorted(samples, key=lambda item: -item[1]):
+            frames = [thread_name.replace(';', ':')]
+            frames += [f"{name} ({os.path.basename(filename)}:{line})" for name, filename, line in stack]
+            lines.append(';'.join(frames) + f" {count}")
+        return '\n'.join(lines) + '\n'
+
+    def speedscope(self):
+        """Get the samples as a speedscope document with one profile per thread
+
+        Returns:
+            dict: speedscope file format, serializable with json.dumps
+        """
+        with self.lock:
+            samples = list(self.samples.items())
+
+        frames = []
+        frame_index = {}
+        profiles = {}
+        for (thread_name, stack), count in samples:
+            indices = []
+            for name, filename, line in stack:
+                key = (name, filename, line)
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({'name': name, 'file': filename, 'line': line})
+                indices.append(frame_index[key])
+
+            profile = profiles.setdefault(thread_name, {
+                'type': 'sampled',
+                'name': thread_name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': 0,
+                'samples': [],
+                'weights': [],
+            })
+            weight = count * self.interval
+            profile['samples'].append(indices)
+            profile['weights'].append(weight)
+            profile['endValue'] += weight
+
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': 'RoboEye',
+            'exporter': 'roboeye-profiler',
+            'shared': {'frames': frames},
+            'profiles': list(profiles.values()),
+        }
+
+    def save(self, filename):
+        """Write the results to a file, speedscope JSON if the name ends with .json
+
+        Args:
+            filename (str): Output file
+        """
+        with open(filename, 'w') as f:
+            if filename.endswith('.json'):
+                json.dump(self.speedscope(), f)
+            else:
+                f.write(self.collapsed())
+
+
+def start_allocation_tracking(frames=16):
+    """Start tracing memory allocations
+
+    Args:
+        frames (int): Number of stack frames stored per allocation
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_allocation_tracking():
+    """Stop tracing memory allocations and free the trace data"""
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def allocation_snapshot(limit=30, group_by='lineno'):
+    """Summarize the memory currently allocated, largest first
+
+    Args:
+        limit (int): Number of entries to include
+        group_by (str): 'lineno', 'filename' or 'traceback'
+
+    Returns:
+        str: Report text, or a hint if tracing is not running
+    """
+    if not tracemalloc.is_tracing():
+        return "Allocation tracking is not running\n"
+
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    stats = snapshot.statistics(group_by)
+    current, peak = tracemalloc.get_traced_memory()
+
+    lines = [f"Traced memory: {current / 1024:.1f} KiB current, {peak / 1024:.1f} KiB peak"]
+    for stat in stats[:limit]:
+        lines.append(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        for line in stat.traceback.format(limit=3, most_recent_first=True):
+            lines.append(f"    {line.strip()}")
+    return '\n'.join(lines) + '\n'
+
+
+def install_signal_handler(profiler, signum=signal.SIGUSR1, filename='roboeye_profile.collapsed'):
+    """Toggle the profiler with a signal, e.g. `kill -USR1 <pid>`
+
+    The first signal starts sampling, the next one stops it and writes the
+    results to filename.
+
+    Args:
+        profiler (SamplingProfiler): Profiler to control
+        signum (int): Signal number
+        filename (str): Output file, speedscope JSON if it ends with .json
+    """
+    def handler(signum, frame):
+        if profiler.is_running:
+            profiler.stop()
+            profiler.save(filename)
+            print(f"Profiler stopped, {profiler.sample_count} samples written to {filename}")
+        else:
+            profiler.start()
+            print("Profiler started")
+
+    signal.signal(signum, handler)
@@ -0,0 +1,328 @@
+"""
+Video recording for RoboEye library
+"""
+
+import os
+import time
+import threading
+from collections import deque
+import cv2
+
+# Longest capture gap filled by repeating a frame, longer gaps restart the timeline
+MAX_GAP_SECONDS = 2.0
+
+
+class Recorder:
+    """Recorder class to save camera frames as rolling video segments"""
+
+    def __init__(self, camera, path='recordings', segment_seconds=60, fps=15,
+                 pre_event_seconds=5, post_event_seconds=5, max_disk_mb=1024,
+                 continuous=True, fourcc='MJPG', jpeg_quality=80):
+        """Initialize the recorder with a camera instance
+
+        Args:
+            camera: RoboEye Camera instance
+            path (str): Directory for segments and event clips
+            segment_seconds (float): Length of each continuous segment
+            fps (float): Frame rate of the video files, frames are repeated or
+                skipped to follow their capture times
+            pre_event_seconds (float): Footage kept in memory before a trigger
+            post_event_seconds (float): Footage recorded after a trigger
+            max_disk_mb (float): Disk quota for recordings, oldest segments are deleted first
+            continuous (bool): Whether to write continuous segments
+            fourcc (str): Four character code of the video codec
+            jpeg_quality (int): JPEG quality of the pre-event buffer
+        """
+        self.camera = camera
+        self.path = path
+        self.segment_seconds = segment_seconds
+        self.fps = fps
+        self.pre_event_seconds = pre_event_seconds
+        self.post_event_seconds = post_event_seconds
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.continuous = continuous
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.jpeg_quality = jpeg_quality
+
+        # Recorder state
+        self.is_recording = False
+        self.recorder_thread = None
+
+        # Continuous segment
+        self.segment_writer = None
+        self.segment_file = None
+        self.segment_start = None
+        self.segment_size = None
+        self.segment_next = None
+
+        # Pre-event buffer of (timestamp, frame size, JPEG buffer), bounded by time and count
+        self.pre_event_buffer = deque(maxlen=max(int(pre_event_seconds * fps * 2), 1))
+
+        # Event clip
+        self.event_lock = threading.Lock()
+        self.pending_event = None
+        self.event_writer = None
+        self.event_file = None
+        self.event_end = None
+        self.event_next = None
+        self.event_label = None
+        self.event_size = None
+
+        # Statistics
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.events_saved = 0
+
+    def start(self):
+        """Start recording in a separate thread"""
+        if self.is_recording:
+            print("Recorder is already running")
+            return
+
+        if not os.path.exists(self.path):
+            os.makedirs(self.path, mode=0o751, exist_ok=True)
+
+        self.is_recording = True
+        self.recorder_thread = threading.Thread(target=self._recorder_loop, daemon=True)
+        self.recorder_thread.start()
+        return True
+
+    def stop(self):
+        """Stop recording and close any open files"""
+        if not self.is_recording:
+            return
+
+        self.is_recording = False
+        if self.recorder_thread:
+            self.recorder_thread.join(timeout=3)
+            self.recorder_thread = None
+
+    def trigger(self, label='event'):
+        """Save the footage around the current moment as an event clip
+
+        The clip contains the buffered pre-event frames and everything
+        captured until post_event_seconds after the last trigger.
+
+        Args:
+            label (str): Label included in the clip file name
+        """
+        with self.event_lock:
+            if self.pending_event is None:
+                self.pending_event = (label, time.time())
+            else:
+                self.pending_event = (self.pending_event[0], time.time())
+
+    def stats(self):
+        """Get recorder statistics
+
+        Returns:
+            dict: Counters and the files currently being written
+        """
+        return {
+            'recording': self.is_recording,
+            'frames_written': self.frames_written,
+            'frames_dropped': self.frames_dropped,
+            'events_saved': self.events_saved,
+            'segment_file': self.segment_file,
+            'event_file': self.event_file,
+            'pre_event_frames': len(self.pre_event_buffer),
+        }
+
+    def _recorder_loop(self):
+        """Main recorder loop running in separate thread"""
+        last_id = self.camera.frame_id
+        try:
+            while self.is_recording:
+                frame = self.camera.wait_for_frame(last_id, timeout=1.0, consumer='recorder')
+                if frame is None:
+                    continue
+
+                # Frames captured while we were busy are skipped, not queued
+                if last_id:
+                    self.frames_dropped += frame.id - last_id - 1
+                last_id = frame.id
+
+                if self.continuous:
+                    self._write_segment(frame)
+                self._write_event(frame)
+                if self.pre_event_seconds > 0:
+                    self._buffer_frame(frame)
+
+        except Exception as e:
+            print(f"Recorder error: {e}")
+            self.is_recording = False
+        finally:
+            self._close_segment()
+            self._close_event()
+
+    def _open_writer(self, prefix, frame, label=None):
+        """Open a video writer sized for the frame
+
+        Returns:
+            tuple: (cv2.VideoWriter, file path)
+        """
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(frame.timestamp))
+        name = f"{prefix}_{stamp}_{frame.id}"
+        if label:
+            name += f"_{label}"
+        full_path = f"{self.path}/{name}.avi"
+
+        height, width = frame.image.shape[:2]
+        writer = cv2.VideoWriter(full_path, self.fourcc, self.fps, (width, height))
+        if not writer.isOpened():
+            raise RuntimeError(f"Failed to open video file {full_path}")
+        return writer, full_path
+
+    def _write_segment(self, frame):
+        """Write a frame to the current segment, rolling over when it is full"""
+        if self.segment_writer is not None:
+            size_changed = self.segment_size != frame.image.shape[:2]
+            if size_changed or frame.timestamp - self.segment_start >= self.segment_seconds:
+                self._close_segment()
+
+        if self.segment_writer is None:
+            self.segment_writer, self.segment_file = self._open_writer('segment', frame)
+            self.segment_start = frame.timestamp
+            self.segment_size = frame.image.shape[:2]
+            self.segment_next = None
+
+        self.segment_next = self._write_paced(self.segment_writer, frame.image, frame.timestamp, self.segment_next)
+        self.frames_written += 1
+
+    def _close_segment(self):
+        """Close the current segment and enforce the disk quota"""
+        if self.segment_writer is None:
+            return
+
+        self.segment_writer.release()
+        self.segment_writer = None
+        self.segment_file = None
+        self._enforce_quota()
+
+    def _buffer_frame(self, frame):
+        """Keep a compressed copy of the frame in the pre-event buffer"""
+        success, buffer = cv2.imencode(
+            '.jpg', frame.image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        )
+        if success:
+            self.pre_event_buffer.append((frame.timestamp, frame.image.shape[:2], buffer))
+
+        # Drop frames older than the pre-event window
+        oldest = frame.timestamp - self.pre_event_seconds
+        while self.pre_event_buffer and self.pre_event_buffer[0][0] < oldest:
+            self.pre_event_buffer.popleft()
+
+    def _write_event(self, frame):
+        """Start, extend, write and finish event clips"""
+        with self.event_lock:
+            pending = self.pending_event
+            self.pending_event = None
+
+        if pending is not None:
+            label, trigger_time = pending
+            self.event_end = trigger_time + self.post_event_seconds
+            if self.event_writer is None:
+                self._open_event(frame, label)
+                self.events_saved += 1
+
+        if self.event_writer is None:
+            return
+
+        if frame.timestamp > self.event_end:
+            self._close_event()
+            return
+
+        if self.event_size != frame.image.shape[:2]:
+            # The camera was reconfigured, continue the clip in a file of the new size
+            label, event_end = self.event_label, self.event_end
+            self._close_event()
+            self._open_event(frame, label)
+            self.event_end = event_end
+
+        self.event_next = self._write_paced(self.event_writer, frame.image, frame.timestamp, self.event_next)
+
+    def _open_event(self, frame, label):
+        """Open an event clip sized for the frame and write the buffered pre-event footage"""
+        self.event_writer, self.event_file = self._open_writer('event', frame, label)
+        self.event_label = label
+        self.event_size = frame.image.shape[:2]
+        self.event_next = None
+
+        # Flush the pre-event footage first
+        for timestamp, buffered_size, buffer in self.pre_event_buffer:
+            if buffered_size == self.event_size:
+                self.event_next = self._write_paced(
+                    self.event_writer, cv2.imdecode(buffer, cv2.IMREAD_COLOR), timestamp, self.event_next
+                )
+        self.pre_event_buffer.clear()
+
+    def _write_paced(self, writer, image, timestamp, next_time):
+        """Write a frame into the fixed-rate file at its capture time
+
+        The frame fills every frame slot up to its timestamp, so frames that
+        arrive slower than the file rate (skipped frames, a lowered camera
+        frame rate) are repeated and frames arriving faster are skipped, and
+        the footage plays back in real time.
+
+        Args:
+            writer (cv2.VideoWriter): Open video file
+            image (numpy.ndarray): Frame image
+            timestamp (float): Capture time of the frame
+            next_time (float): Time of the next free slot, None for a new file
+
+        Returns:
+            float: Time of the next free slot
+        """
+        period = 1.0 / self.fps
+        if next_time is None or timestamp - next_time > MAX_GAP_SECONDS:
+            next_time = timestamp
+
+        while next_time <= timestamp + period / 2:
+            writer.write(image)
+            next_time += period
+        return next_time
+
+    def _close_event(self):
+        """Close the current event clip"""
+        if self.event_writer is None:
+            return
+
+        self.event_writer.release()
+        self.event_writer = None
+        self.event_file = None
+        self.event_end = None
+        self.event_next = None
+        self.event_label = None
+        self.event_size = None
+        self._enforce_quota()
+
+    def _enforce_quota(self):
+        """Delete the oldest recordings until the directory fits the quota
+
+        Continuous segments are deleted before event clips, and files that
+        are still being written are never touched.
+        """
+        open_files = {self.segment_file, self.event_file}
+        recordings = []
+        total = 0
+        for name in os.listdir(self.path):
+            full_path = f"{self.path}/{name}"
+            if not name.endswith('.avi') or not name.startswith(('segment_', 'event_')):
+                continue
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue
+            total += stat.st_size
+            if full_path not in open_files:
+                recordings.append((name.startswith('event_'), stat.st_mtime, stat.st_size, full_path))
+
+        recordings.sort()
+        for _, _, size, full_path in recordings:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(full_path)
+                total -= size
+            except OSError as e:
+                print(f"Recorder failed to delete {full_path}: {e}")
@@ -0,0 +1,283 @@
+"""
+Offline batch detection over captured datasets
+
+Walks a directory of images (e.g. the stop_dataset_photo*.jpg files from
+run_camera.py) or recordings from the Recorder, decodes and resizes them in
+a process pool, runs the detector in batches and appends one JSON line per
+image (or video frame) to an index file. Entries already in the index are
+skipped, so an interrupted run can simply be started again.
+
+Usage:
+    python run_batch_detection.py DATASET_DIR [--model yolov8n.pt] [--index FILE]
+"""
+
+import os
+import json
+import time
+import argparse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+from detection import MODEL_SIZE, preprocess, detect_preprocessed
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+VIDEO_EXTENSIONS = ('.avi', '.mp4', '.mkv')
+
+
+def find_files(root, extensions):
+    """List files below root with the given extensions, relative to root"""
+    found = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.lower().endswith(extensions):
+                found.append(os.path.relpath(os.path.join(directory, name), root))
+    return sorted(found)
+
+
+def load_index(index_file):
+    """Read the keys of the entries already in the index"""
+    done = set()
+    if not os.path.exists(index_file):
+        return done
+
+    with open(index_file) as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['file'])
+            except (ValueError, KeyError):
+                # Partially written last line of an interrupted run
+                continue
+    return done
+
+
+def index_ends_with_newline(index_file):
+    """Whether the index file is empty or its last line is complete"""
+    with open(index_file, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def load_image(job):
+    """Decode and resize one image, runs in a worker process
+
+    Args:
+        job (tuple): (root directory, relative path, model input size)
+
+    Returns:
+        list: One (relative path, resized image, original shape, decode time in ms, error) entry,
+            with image None and the error message if the file could not be decoded
+    """
+    root, name, size = job
+    start = time.perf_counter()
+    image = cv2.imread(os.path.join(root, name), cv2.IMREAD_COLOR)
+    if image is None:
+        return [(name, None, None, 0.0, "failed to decode image")]
+    resized = preprocess(image, size)
+    return [(name, resized, image.shape, 1000 * (time.perf_counter() - start), None)]
+
+
+def load_video_frames(job):
+    """Decode and resize a range of frames of a recording, runs in a worker process
+
+    Args:
+        job (tuple): (root directory, relative path, model input size, first frame,
+            end frame or None for the end of the file, frame numbers to skip)
+
+    Returns:
+        list: ('name#frame', resized image, original shape, decode time in ms, error) entries
+    """
+    root, name, size, first, end, skip = job
+    capture = cv2.VideoCapture(os.path.join(root, name))
+    if not capture.isOpened():
+        return [(name, None, None, 0.0, "failed to open video")]
+
+    entries = []
+    try:
+        # Seek past the frames indexed by earlier runs instead of decoding them
+        if first:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, first)
+        index = first
+        while end is None or index < end:
+            start = time.perf_counter()
+            success, image = capture.read()
+            if not success:
+                break
+            if index not in skip:
+                resized = preprocess(image, size)
+                entries.append((f"{name}#{index}", resized, image.shape, 1000 * (time.perf_counter() - start), None))
+            index += 1
+    finally:
+        capture.release()
+    return entries
+
+
+def video_jobs(root, name, size, done, chunk_size):
+    """Split the frames of a recording that are not indexed yet into decode jobs
+
+    Args:
+        root (str): Dataset directory
+        name (str): Recording path relative to root
+        size (int): Model input size
+        done (set): Keys already in the index
+        chunk_size (int): Frames per job
+
+    Returns:
+        list: Jobs for load_video_frames
+    """
+    prefix = f"{name}#"
+    indexed = set()
+    for key in done:
+        if key.startswith(prefix) and key[len(prefix):].isdigit():
+            indexed.add(int(key[len(prefix):]))
+
+    first = 0
+    while first in indexed:
+        first += 1
+
+    # Container frame count, read from the header without decoding
+    capture = cv2.VideoCapture(os.path.join(root, name))
+    count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) if capture.isOpened() else 0
+    capture.release()
+
+    if count <= 0:
+        # Unknown length, decode the rest of the file in one job
+        return [(root, name, size, first, None, frozenset(i for i in indexed if i >= first))]
+
+    jobs = []
+    for start in range(first, count, chunk_size):
+        end = min(start + chunk_size, count)
+        skip = frozenset(i for i in indexed if start <= i < end)
+        if len(skip) < end - start:
+            jobs.append((root, name, size, start, end, skip))
+    return jobs
+
+
+class IndexWriter:
+    """Batch decoded images through the detector and append results to the index"""
+
+    def __init__(self, model, index, batch_size, conf, size):
+        self.model = model
+        self.index = index
+        self.batch_size = batch_size
+        self.conf = conf
+        self.size = size
+        self.batch = []
+        self.processed = 0
+        self.failed = 0
+
+    def add(self, name, image, shape, decode_ms, error=None):
+        """Queue one decoded image, running the detector when the batch is full"""
+        if image is None:
+            # Recorded so that later runs do not retry the file
+            print(f"Failed to decode {name}: {error}")
+            self.index.write(json.dumps({'file': name, 'error': error}, separators=(',', ':')) + '\n')
+            self.failed += 1
+            return
+        self.batch.append((name, image, shape, decode_ms))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Run the detector on the queued images and write their entries"""
+        if not self.batch:
+            return
+
+        start = time.perf_counter()
+        results = detect_preprocessed(
+            self.model,
+            [image for _, image, _, _ in self.batch],
+            [shape for _, _, shape, _ in self.batch],
+            self.conf,
+            self.size
+        )
+        infer_ms = 1000 * (time.perf_counter() - start) / len(self.batch)
+
+        for (name, _, shape, decode_ms), detections in zip(self.batch, results):
+            entry = {
+                'file': name,
+                'width': shape[1],
+                'height': shape[0],
+                'detections': [
+                    list(detection['bbox']) + [round(detection['confidence'], 3), detection['class_id']]
+                    for detection in detections
+                ],
+                'decode_ms': round(decode_ms, 1),
+                'infer_ms': round(infer_ms, 1),
+            }
+            self.index.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self.index.flush()
+
+        self.processed += len(self.batch)
+        self.batch = []
+        print(f"Processed {self.processed} images")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the detector over a directory of captured images")
+    parser.add_argument('dataset', help="Directory with images and/or recordings")
+    parser.add_argument('--model', default='yolov8n.pt', help="YOLO model file")
+    parser.add_argument('--index', default=None, help="Index file (default: DATASET/detections.jsonl)")
+    parser.add_argument('--batch-size', type=int, default=16, help="Images per model call")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Decode processes")
+    parser.add_argument('--conf', type=float, default=0.7, help="Confidence threshold")
+    parser.add_argument('--size', type=int, default=MODEL_SIZE, help="Model input size")
+    args = parser.parse_args()
+
+    index_file = args.index or os.path.join(args.dataset, 'detections.jsonl')
+    done = load_index(index_file)
+
+    images = [name for name in find_files(args.dataset, IMAGE_EXTENSIONS) if name not in done]
+    # A recording that could not be opened has an error entry under its own name
+    videos = [name for name in find_files(args.dataset, VIDEO_EXTENSIONS) if name not in done]
+
+    # Image jobs decode one file, video jobs one batch of frames
+    jobs = [(load_image, (args.dataset, name, args.size)) for name in images]
+    for name in videos:
+        jobs += [(load_video_frames, job) for job in video_jobs(args.dataset, name, args.size, done, args.batch_size)]
+
+    print(f"{len(images)} new images, {len(jobs) - len(images)} recording chunks, "
+          f"{len(done)} entries already indexed")
+    if not jobs:
+        return
+
+    # Imported only in the main process, the spawned decode workers never load it
+    from ultralytics import YOLO
+    print("Loading YOLO model...")
+    model = YOLO(args.model)
+
+    start = time.time()
+    with open(index_file, 'a') as index:
+        # Do not append to a partially written last line of an interrupted run
+        if index.tell() > 0 and not index_ends_with_newline(index_file):
+            index.write('\n')
+
+        writer = IndexWriter(model, index, args.batch_size, args.conf, args.size)
+
+        # Keep a bounded number of decode jobs in flight, a video job holds a whole batch of frames
+        max_pending = 2 * args.workers
+        # Spawned rather than forked, so workers do not inherit the loaded model and torch
+        spawn = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=spawn) as pool:
+            pending = deque()
+            for func, job in jobs:
+                pending.append(pool.submit(func, job))
+                if len(pending) >= max_pending:
+                    for entry in pending.popleft().result():
+                        writer.add(*entry)
+            while pending:
+                for entry in pending.popleft().result():
+                    writer.add(*entry)
+
+        writer.flush()
+        index.flush()
+
+    elapsed = time.time() - start
+    print(f"Done: {writer.processed} indexed, {writer.failed} failed in {elapsed:.1f}s -> {index_file}")
+
+
+if __name__ == "__main__":
+    main()
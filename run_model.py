@@ -1,12 +1,16 @@
 from picarx import Picarx
 from camera import Camera
 from display import Display
+from recorder import Recorder
+from telemetry import TelemetryLog, LatencyTracker
+from pipeline import Pipeline
+from detection import RoiDetector
+from profiler import SamplingProfiler, install_signal_handler
 from pygame import time
 from pygame import mixer
 from robot_hat import PWM, Music, Buzzer, set_volume, enable_speaker, disable_speaker
 import os
-import numpy as np
-import cv2
+from datetime import datetime
 from ultralytics import YOLO
 
 STEERING_MIN = -35
@@ -15,56 +19,21 @@ STEERING_MAX = 35
 
 
 
-def detect_objects(model, frame):
-    """
-    Detect objects using YOLO model
-    Returns: list of detections with coordinates and confidence
-    """
-    # Resize frame to model input size (416x416)
-    resized_frame = cv2.resize(frame, (416, 416))
-    
-    # Run inference
-    results = model(resized_frame, verbose=False, conf=0.7)
-    
-    detections = []
-    for result in results:
-        boxes = result.boxes
-        if boxes is not None:
-            for box in boxes:
-                # Get coordinates (in 416x416 space)
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                confidence = box.conf[0].cpu().numpy()
-                
-                # Map coordinates back to original 640x480 frame
-                orig_x1 = int(x1 * 640 / 416)
-                orig_y1 = int(y1 * 480 / 416)
-                orig_x2 = int(x2 * 640 / 416)
-                orig_y2 = int(y2 * 480 / 416)
-                
-                # Calculate center coordinates
-                center_x = (orig_x1 + orig_x2) // 2
-                center_y = (orig_y1 + orig_y2) // 2
-                
-                detections.append({
-                    'bbox': (orig_x1, orig_y1, orig_x2, orig_y2),
-                    'center': (center_x, center_y),
-                    'confidence': confidence
-                })
-    
-    return detections
-
 def main():
     px = Picarx()
     clock = time.Clock()
-    FPS = 30
     
     # Load YOLO model
     print("Loading YOLO model...")
     model = YOLO('yolov8n.pt')  # Your trained model file
     print("Model loaded successfully!")
     
-    timer = 0
+    # Per-inference detection record, analyzed later with telemetry.load_telemetry()
+    telemetry = TelemetryLog(datetime.now().strftime('telemetry/model_%Y%m%d_%H%M%S.bin'))
+    latency_tracker = LatencyTracker()
 
+    # Created inside the try block, which fails early if the camera does not start
+    camera = display = recorder = pipeline = None
     try:
         # Initialize camera
         camera = Camera(
@@ -76,10 +45,20 @@ def main():
         print("Starting camera...")
         camera.start()
         camera.show_fps(True)
-        camera.enable_detection_overlay(confidence=True)
+        # Detections are published on /events and drawn by the web page,
+        # so they are not burned into the frames on the robot
+        camera.enable_detection_overlay(False)
+
+        # Keep event clips around detections, without continuous recording
+        recorder = Recorder(camera, path='recordings', continuous=False)
+        recorder.start()
+
+        # Idle until started via POST /profile/start or `kill -USR1 <pid>`
+        profiler = SamplingProfiler()
+        install_signal_handler(profiler)
 
         # Initialize display
-        display = Display(camera)
+        display = Display(camera, recorder=recorder, profiler=profiler)
         display.show(
             local=True,
             web=True,
@@ -88,35 +67,56 @@ def main():
 
         px.set_cam_tilt_angle(0)
         px.set_cam_pan_angle(0)
-        
-        while True:
-            if timer > 30:
-                photo = camera.get_image()
-                
-                if photo is not None:
-                    # Object detection
-                    detections = detect_objects(model, photo)
-                    camera_detections = []
-                    # Print object coordinates if detected
-                    if detections:
-                        print(f"Objects detected: {len(detections)}")
-                        for i, detection in enumerate(detections):
-                            center_x, center_y = detection['center']
-                            confidence = detection['confidence']
-                            #camera_detections.append(detection['bbox'])
-                            x1, y1, x2, y2 = detection['bbox']
-                            camera_detections.append((x1, y1, x2, y2, detection['confidence']))
-
-
-
-                            print(f"  Object {i+1}: Center=({center_x}, {center_y}), Confidence={confidence:.2f}")
-                        camera.update_detections(camera_detections)
-                timer = 0
-                    
+
+        # Low-res full-frame pass plus full-res crops around recent detections,
+        # so small and distant stop signs are not lost in the downscale
+        roi_detector = RoiDetector(model, conf=0.7)
+
+        def detect(item):
+            item['detections'] = roi_detector.detect(item['frame'])
+            return item
+
+        def publish(item):
+            detections = item['detections']
+            camera_detections = []
+            for detection in detections:
+                x1, y1, x2, y2 = detection['bbox']
+                camera_detections.append((x1, y1, x2, y2, detection['confidence']))
+            # Publish even when empty so clients clear stale boxes
+            camera.update_detections(camera_detections)
+
+            # Time from the sensor producing the frame to the published detections
+            latency = item['capture'].age()
+            latency_tracker.record(latency)
+
+            # Log a detection summary instead of printing every object
+            if detections:
+                recorder.trigger('detection')
+                best = max(detections, key=lambda detection: detection['confidence'])
+                telemetry.write(
+                    frame_id=item['frame_id'],
+                    detection_count=len(detections),
+                    detection_confidence=best['confidence'],
+                    detection_bbox=best['bbox'],
+                    latency=latency
+                )
             else:
-                timer += 1
-            
-            clock.tick(FPS)
+                telemetry.write(frame_id=item['frame_id'], latency=latency)
+
+        # Detection always works on the newest frame, older ones are dropped
+        pipeline = Pipeline(camera)
+        pipeline.add_stage('detect', detect, workers=1, queue_size=1)
+        pipeline.add_sink('publish', publish)
+        pipeline.start()
+
+        # Publish per-stage timings once a second
+        while True:
+            clock.tick(1)
+            stages = pipeline.stats()['stages']
+            camera.update_telemetry(
+                stage_ms={name: stage['avg_ms'] for name, stage in stages.items()},
+                latency_ms=latency_tracker.stats()
+            )
 
     except KeyboardInterrupt:
         print("\nExiting...")
@@ -125,8 +125,15 @@ def main():
     finally:
         print("Cleaning up...")
         disable_speaker()
-        display.close()
-        camera.stop()
+        if pipeline is not None:
+            pipeline.stop()
+        if display is not None:
+            display.close()
+        if recorder is not None:
+            recorder.stop()
+        if camera is not None:
+            camera.stop()
+        telemetry.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+Example usage of the RoboEye library with a front and a downward camera
+"""
+
+from camera import Camera
+from cameras import CameraGroup, TiledView
+from display import Display
+from detection import detect_frame_set
+from ultralytics import YOLO
+
+
+def main():
+    # One model instance serves all cameras
+    print("Loading YOLO model...")
+    model = YOLO('yolov8n.pt')
+    print("Model loaded successfully!")
+
+    # Register the cameras, the first one is the reference for frame pairing
+    cameras = CameraGroup(max_skew=0.05)
+    cameras.add('front', Camera(size=(640, 480), camera_num=0))
+    cameras.add('down', Camera(size=(640, 480), camera_num=1))
+
+    # Composite of both cameras, rendered once per frame set
+    tiled = TiledView(cameras, tile_size=(320, 240))
+
+    try:
+        print("Starting cameras...")
+        cameras.start()
+        tiled.start()
+
+        # Composite on the local window and /video_feed, each camera on /video_feed/<name>
+        display = Display(tiled, cameras=cameras)
+        display.show(
+            local=True,
+            web=True,
+            port=9000
+        )
+
+        last_id = 0
+        while True:
+            frame_set = cameras.wait_for_frame_set(last_id, timeout=1.0, consumer='detector')
+            if frame_set is None:
+                continue
+            last_id = frame_set[cameras.names[0]].id
+
+            # Both cameras' frames go through the model in one batch
+            results = detect_frame_set(model, frame_set)
+
+            # Published on the composite, which /events and the web overlay describe
+            tiled.update_frame_set_detections(frame_set, results)
+
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        print("Cleaning up...")
+        display.close()
+        tiled.stop()
+        cameras.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,101 @@ Flask streaming server for RoboEye library
 """
 
 import cv2
+import json
+import math
 import time
+import uuid
 import logging
-from flask import Flask, Response, render_template
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from flask import Flask, Response, render_template, request, jsonify
+from profiler import start_allocation_tracking, stop_allocation_tracking, allocation_snapshot
 
 # Suppress Flask debug messages
 logging.getLogger('werkzeug').setLevel(logging.ERROR)
 
-def create_streaming_server(camera):
+# Upper bound for long-poll waits on /still.jpg
+MAX_LONG_POLL = 30.0
+
+# Seconds between keepalive comments on an idle event stream
+EVENT_KEEPALIVE = 15.0
+
+# Identifies this process in ETags and frame URLs, frame ids restart at 1 on every start
+RUN_ID = uuid.uuid4().hex[:12]
+
+
+def frame_key(frame):
+    """Key of a frame that is unique across restarts, e.g. '3f2a9c01d4e7-42'"""
+    return f"{RUN_ID}-{frame.id}"
+
+
+class JpegCache:
+    """Encode each frame once and share the JPEG bytes between clients"""
+
+    def __init__(self, size=8):
+        """Initialize the cache
+
+        Args:
+            size (int): Number of encoded frames to keep
+        """
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, frame, size=None):
+        """Get the JPEG bytes for a frame, encoding it on first use
+
+        Args:
+            frame: Frame record from Camera.get_frame()
+            size (tuple): Output resolution (width, height), frame resolution if None
+
+        Returns:
+            bytes: Encoded JPEG, or None if encoding failed
+        """
+        key = (frame.id, size)
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                return data
+
+        image = frame.image
+        if size and size != (image.shape[1], image.shape[0]):
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        success, buffer = cv2.imencode('.jpg', image)
+        if not success:
+            return None
+        data = buffer.tobytes()
+
+        with self.lock:
+            self.entries[key] = data
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return data
+
+
+def create_streaming_server(camera, event_rate=10, recorder=None, profiler=None, cameras=None):
     """Create Flask app for streaming
 
     Args:
-        camera: RoboEye Camera instance
+        camera: RoboEye Camera instance, or a TiledView for several cameras
+        event_rate (float): Maximum telemetry events per second per client
+        recorder: Optional RoboEye Recorder controlled through /record
+        profiler: Optional SamplingProfiler controlled through /profile
+        cameras: Optional CameraGroup served per camera on /video_feed/<name>
 
     Returns:
         Flask app instance
     """
     app = Flask(__name__)
+    jpeg_cache = JpegCache(size=max(camera.frame_history.maxlen or 0, 2))
+
+    # One cache per named camera, so each frame is encoded once for all clients
+    camera_caches = {}
+    if cameras is not None:
+        camera_caches = {name: JpegCache(size=max(cameras.get(name).frame_history.maxlen or 0, 2))
+                         for name in cameras.names}
 
     @app.route('/')
     def index():
@@ -36,34 +114,176 @@ def create_streaming_server(camera):
                 padding: 20px; 
                 text-align: center;
               }
+              #view {
+                position: relative;
+                display: inline-block;
+                max-width: 100%;
+              }
               img { 
+                display: block;
                 max-width: 100%; 
                 border: 1px solid #ddd; 
                 box-shadow: 0 0 10px rgba(0,0,0,0.1);
               }
+              #overlay {
+                position: absolute;
+                left: 0;
+                top: 0;
+                pointer-events: none;
+              }
+              #telemetry {
+                font-family: monospace;
+                color: #555;
+                margin-top: 10px;
+              }
               h1 { color: #333; }
             </style>
           </head>
           <body>
             <h1>RoboEye Camera Stream</h1>
-            <img src="/video_feed" />
+            <div id="view">
+              <img id="stream" src="/video_feed" />
+              <canvas id="overlay"></canvas>
+            </div>
+            <div id="telemetry"></div>
+            <script>
+              var img = document.getElementById('stream');
+              var canvas = document.getElementById('overlay');
+              var info = document.getElementById('telemetry');
+              var last = null;
+
+              function draw() {
+                canvas.width = img.clientWidth;
+                canvas.height = img.clientHeight;
+                var ctx = canvas.getContext('2d');
+                ctx.clearRect(0, 0, canvas.width, canvas.height);
+                if (!last || !last.width) { return; }
+                var sx = canvas.width / last.width;
+                var sy = canvas.height / last.height;
+                ctx.strokeStyle = '#00ff00';
+                ctx.fillStyle = '#00ff00';
+                ctx.lineWidth = 2;
+                ctx.font = '12px Arial';
+                last.detections.forEach(function (d) {
+                  ctx.strokeRect(d[0] * sx, d[1] * sy, (d[2] - d[0]) * sx, (d[3] - d[1]) * sy);
+                  if (d.length > 4) {
+                    ctx.fillText('C: ' + d[4].toFixed(2), d[0] * sx + 2, d[1] * sy + 12);
+                  }
+                });
+              }
+
+              var events = new EventSource('/events');
+              events.onmessage = function (e) {
+                last = JSON.parse(e.data);
+                var parts = ['FPS: ' + last.fps];
+                for (var key in last.telemetry) {
+                  parts.push(key + ': ' + JSON.stringify(last.telemetry[key]));
+                }
+                info.textContent = parts.join('  ');
+                draw();
+              };
+              window.addEventListener('resize', draw);
+            </script>
           </body>
         </html>
         """
 
-    def generate_frames():
-        """Generator function for video streaming"""
+    def build_event():
+        """Build the JSON-friendly telemetry event for the current state
+
+        Returns:
+            tuple: (state key used to detect changes, event dict)
+        """
+        version, detections, telemetry = camera.get_telemetry()
+        event = {
+            'run': RUN_ID,
+            'frame_id': camera.frame_id,
+            'time': round(time.time(), 3),
+            'fps': camera.fps,
+            'width': camera.camera_width,
+            'height': camera.camera_height,
+            'detections': [[round(float(value), 2) for value in detection] for detection in detections],
+            'telemetry': telemetry,
+        }
+        return (version, camera.fps), event
+
+    def generate_events(rate):
+        """Generator function for the server-sent event stream
+
+        Args:
+            rate (float): Maximum number of events per second for this client
+        """
+        interval = 1.0 / rate
+        last_key = None
+        last_sent = 0.0
+        next_tick = time.time()
         while True:
-            if camera.is_running and camera.current_frame is not None:
-                # Encode frame to JPEG
-                success, buffer = cv2.imencode('.jpg', camera.current_frame)
-                if success:
-                    frame_bytes = buffer.tobytes()
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+            # Coalesce everything that changed during the interval into one event
+            delay = next_tick - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            next_tick = max(next_tick + interval, time.time())
+
+            key, event = build_event()
+            if key != last_key:
+                last_key = key
+                last_sent = time.time()
+                yield 'data: ' + json.dumps(event, separators=(',', ':')) + '\n\n'
+            elif time.time() - last_sent > EVENT_KEEPALIVE:
+                last_sent = time.time()
+                yield ': keepalive\n\n'
 
-            # Maintain reasonable frame rate
-            time.sleep(0.03)  # ~30fps
+    def generate_frames(source=camera, cache=jpeg_cache):
+        """Generator function for video streaming
+
+        Args:
+            source: Camera to stream
+            cache (JpegCache): Encoded frames shared by the clients of this camera
+        """
+        last_id = 0
+        while True:
+            # Only send frames that this client has not seen yet
+            frame = source.wait_for_frame(last_id, timeout=1.0, consumer='web_stream')
+            if frame is None:
+                if not source.is_running:
+                    time.sleep(0.1)
+                continue
+            last_id = frame.id
+
+            frame_bytes = cache.get(frame, source.stream_size)
+            if frame_bytes:
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+
+    def frame_response(frame, immutable=False):
+        """Build a cacheable JPEG response for a frame record
+
+        Args:
+            frame: Frame record from the camera history
+            immutable (bool): Whether the URL always maps to this frame
+
+        Returns:
+            Flask Response, 304 if the client already has the frame
+        """
+        etag = frame_key(frame)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            frame_bytes = jpeg_cache.get(frame)
+            if frame_bytes is None:
+                return Response("Failed to encode frame", status=500, mimetype='text/plain')
+            response = Response(frame_bytes, mimetype='image/jpeg')
+
+        response.set_etag(etag)
+        response.last_modified = datetime.fromtimestamp(frame.timestamp, timezone.utc)
+        response.headers['X-Frame-Id'] = str(frame.id)
+        response.headers['X-Run-Id'] = RUN_ID
+        if immutable:
+            response.cache_control.public = True
+            response.cache_control.max_age = 3600
+        else:
+            response.cache_control.no_cache = True
+        return response
 
     @app.route('/video_feed')
     def video_feed():
@@ -79,18 +299,219 @@ def create_streaming_server(camera):
                 mimetype='text/html'
             )
 
+    @app.route('/video_feed/<name>')
+    def camera_video_feed(name):
+        """Video streaming route for one camera of the group"""
+        if name not in camera_caches:
+            return Response("Unknown camera", status=404, mimetype='text/plain')
+
+        source = cameras.get(name)
+        if not source.is_running:
+            return Response(
+                "<h1>Camera is not running</h1>",
+                mimetype='text/html'
+            )
+        return Response(
+            generate_frames(source, camera_caches[name]),
+            mimetype='multipart/x-mixed-replace; boundary=frame'
+        )
+
+    @app.route('/cameras')
+    def camera_list():
+        """Names and stream URLs of the cameras in the group"""
+        return jsonify({
+            name: {
+                'url': f'/video_feed/{name}',
+                'running': cameras.get(name).is_running,
+                'fps': cameras.get(name).fps,
+            } for name in camera_caches
+        })
+
+    @app.route('/events')
+    def events():
+        """Detection and telemetry event stream (server-sent events)
+
+        Query args:
+            rate (float): Requested events per second, capped by event_rate
+        """
+        rate = request.args.get('rate', default=event_rate, type=float)
+        if not math.isfinite(rate):
+            rate = event_rate
+        rate = min(max(rate, 0.1), event_rate)
+        return Response(
+            generate_events(rate),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
     @app.route('/still.jpg')
     def still_image():
-        """Single still image route"""
-        if camera.is_running and camera.current_frame is not None:
-            success, buffer = cv2.imencode('.jpg', camera.current_frame)
-            if success:
-                return Response(buffer.tobytes(), mimetype='image/jpeg')
+        """Single still image route
+
+        Query args:
+            after (int): Long-poll until a frame newer than this id exists
+            run (str): X-Run-Id the after id belongs to, ids from another run are ignored
+            timeout (float): Maximum long-poll wait in seconds
+        """
+        if not camera.is_running:
+            return Response("Camera not available", status=503, mimetype='text/plain')
+
+        after = request.args.get('after', type=int)
+        if after is not None:
+            if request.args.get('run', default=RUN_ID) != RUN_ID:
+                # Frame ids restarted since the client saw this one
+                after = 0
+            timeout = request.args.get('timeout', default=10.0, type=float)
+            if timeout is None or not math.isfinite(timeout):
+                timeout = 10.0
+            frame = camera.wait_for_frame(after, timeout=min(max(timeout, 0.0), MAX_LONG_POLL))
+            if frame is None:
+                # No newer frame within the timeout
+                return Response(status=204)
+        else:
+            frame = camera.get_frame()
+
+        if frame is None:
+            return Response("Camera not available", status=503, mimetype='text/plain')
+
+        return frame_response(frame)
+
+    @app.route('/still/full.jpg')
+    def full_still_image():
+        """Single still image captured in the camera's still mode"""
+        if not camera.is_running:
+            return Response("Camera not available", status=503, mimetype='text/plain')
+
+        try:
+            frame = camera.capture_still()
+        except RuntimeError as e:
+            return Response(f"Still capture failed: {e}", status=503, mimetype='text/plain')
+        if frame is None:
+            return Response("Camera not available", status=503, mimetype='text/plain')
+
+        success, buffer = cv2.imencode('.jpg', frame.image)
+        if not success:
+            return Response("Failed to encode frame", status=500, mimetype='text/plain')
+        response = Response(buffer.tobytes(), mimetype='image/jpeg')
+        response.cache_control.no_store = True
+        return response
+
+    @app.route('/frames')
+    def frame_list():
+        """List the ids of the frames that can still be fetched"""
+        with camera.frame_condition:
+            frames = list(camera.frame_history)
+        return jsonify({
+            'run': RUN_ID,
+            'latest': frame_key(frames[-1]) if frames else None,
+            'frames': [{
+                'id': frame_key(frame),
+                'seq': frame.id,
+                'url': f'/frames/{frame_key(frame)}.jpg',
+                'timestamp': frame.timestamp,
+                'sensor_timestamp': frame.sensor_timestamp,
+                'exposure_time': frame.exposure_time,
+                'analogue_gain': frame.analogue_gain,
+                'digital_gain': frame.digital_gain,
+            } for frame in frames]
+        })
+
+    @app.route('/frames/<run_id>-<int:frame_id>.jpg')
+    def frame_by_id(run_id, frame_id):
+        """Fetch one of the last captured frames by its id from /frames"""
+        frame = camera.get_frame(frame_id) if run_id == RUN_ID else None
+        if frame is None:
+            return Response("Frame not available", status=404, mimetype='text/plain')
+
+        return frame_response(frame, immutable=True)
 
-        return Response("Camera not available", mimetype='text/plain')
+    @app.route('/record')
+    def record_status():
+        """Recorder statistics"""
+        if recorder is None:
+            return Response("Recorder not available", status=404, mimetype='text/plain')
+        return jsonify(recorder.stats())
+
+    @app.route('/record/trigger', methods=['POST'])
+    def record_trigger():
+        """Save an event clip around the current moment
+
+        Query args:
+            label (str): Label included in the clip file name
+        """
+        if recorder is None or not recorder.is_recording:
+            return Response("Recorder not available", status=404, mimetype='text/plain')
+        label = ''.join(c for c in request.args.get('label', 'api') if c.isalnum() or c in '-_')
+        recorder.trigger(label or 'api')
+        return jsonify(recorder.stats())
+
+    if profiler is not None:
+        register_profiler_routes(app, profiler)
 
     return app
 
+def register_profiler_routes(app, profiler):
+    """Add routes to control a sampling profiler at runtime
+
+    Args:
+        app: Flask app instance
+        profiler: SamplingProfiler instance
+    """
+
+    def profile_output():
+        """Profiler results in the format requested by ?format="""
+        if request.args.get('format') == 'speedscope':
+            return jsonify(profiler.speedscope())
+        return Response(profiler.collapsed(), mimetype='text/plain')
+
+    @app.route('/profile')
+    def profile_status():
+        """Profiler status, or the samples so far with ?format=collapsed|speedscope"""
+        if 'format' in request.args:
+            return profile_output()
+        return jsonify(profiler.status())
+
+    @app.route('/profile/start', methods=['POST'])
+    def profile_start():
+        """Start sampling all threads
+
+        Query args:
+            interval (float): Seconds between samples
+        """
+        try:
+            profiler.start(request.args.get('interval', type=float))
+        except ValueError as e:
+            return Response(f"{e}\n", status=400, mimetype='text/plain')
+        return jsonify(profiler.status())
+
+    @app.route('/profile/stop', methods=['POST'])
+    def profile_stop():
+        """Stop sampling and return the results"""
+        profiler.stop()
+        return profile_output()
+
+    @app.route('/profile/alloc/start', methods=['POST'])
+    def profile_alloc_start():
+        """Start tracing memory allocations"""
+        start_allocation_tracking()
+        return Response("Allocation tracking started\n", mimetype='text/plain')
+
+    @app.route('/profile/alloc')
+    def profile_alloc():
+        """Snapshot of the largest allocations
+
+        Query args:
+            limit (int): Number of entries
+        """
+        return Response(allocation_snapshot(request.args.get('limit', default=30, type=int)),
+                        mimetype='text/plain')
+
+    @app.route('/profile/alloc/stop', methods=['POST'])
+    def profile_alloc_stop():
+        """Stop tracing memory allocations"""
+        stop_allocation_tracking()
+        return Response("Allocation tracking stopped\n", mimetype='text/plain')
+
 def start_streaming_server(app, port=9000):
     """Start the Flask streaming server
 
@@ -0,0 +1,219 @@
+"""
+Binary telemetry log for RoboEye library
+"""
+
+import os
+import time
+import threading
+from collections import deque
+import numpy as np
+
+# File header: magic, format version, record size
+TELEMETRY_MAGIC = b'RETL'
+TELEMETRY_VERSION = 2
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u4'),
+    ('record_size', '<u4'),
+    ('reserved', '<u4'),
+])
+
+# One fixed-width record per control tick
+TELEMETRY_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('frame_id', '<i8'),
+    ('sensors', '<f4', (2,)),
+    ('error', '<f4'),
+    ('p_term', '<f4'),
+    ('i_term', '<f4'),
+    ('d_term', '<f4'),
+    ('steering', '<f4'),
+    ('detection_count', '<u2'),
+    ('detection_confidence', '<f4'),
+    ('detection_bbox', '<f4', (4,)),
+    ('latency', '<f4'),
+])
+
+
+def _make_header():
+    """Build the file header for the current record format"""
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header['magic'] = TELEMETRY_MAGIC
+    header['version'] = TELEMETRY_VERSION
+    header['record_size'] = TELEMETRY_DTYPE.itemsize
+    return header.tobytes()
+
+
+class TelemetryLog:
+    """Append-only log of fixed-width telemetry records
+
+    Records are written into a preallocated buffer and appended to the file
+    in batches, so logging a control tick costs a few field assignments.
+    """
+
+    def __init__(self, filename, batch_size=256, flush_interval=1.0):
+        """Initialize the telemetry log
+
+        Args:
+            filename (str): Log file, appended to if it already exists
+            batch_size (int): Number of records buffered before writing
+            flush_interval (float): Maximum seconds between writes
+        """
+        self.filename = filename
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.buffer = np.zeros(batch_size, dtype=TELEMETRY_DTYPE)
+        self.count = 0
+        self.records_written = 0
+        self.last_flush = time.time()
+        self.lock = threading.Lock()
+        self.file = None
+
+    def open(self):
+        """Open the log file, writing the header for a new file"""
+        if self.file is not None:
+            return self
+
+        directory = os.path.dirname(self.filename)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, mode=0o751, exist_ok=True)
+
+        new_file = not os.path.exists(self.filename) or os.path.getsize(self.filename) == 0
+        if not new_file:
+            with open(self.filename, 'rb') as f:
+                if f.read(HEADER_DTYPE.itemsize) != _make_header():
+                    raise ValueError(f"{self.filename} is not a compatible telemetry log")
+
+            # Drop a partially written trailing record so appends stay aligned
+            size = os.path.getsize(self.filename) - HEADER_DTYPE.itemsize
+            if size % TELEMETRY_DTYPE.itemsize:
+                os.truncate(self.filename, HEADER_DTYPE.itemsize + size - size % TELEMETRY_DTYPE.itemsize)
+
+        self.file = open(self.filename, 'ab')
+        if new_file:
+            self.file.write(_make_header())
+        self.last_flush = time.time()
+        return self
+
+    def write(self, **fields):
+        """Append one record
+
+        Args:
+            **fields: Values for TELEMETRY_DTYPE fields, missing fields are zero
+                and timestamp defaults to the current time
+        """
+        with self.lock:
+            record = self.buffer[self.count]
+            self.buffer[self.count] = 0
+            record['timestamp'] = time.time()
+            for name, value in fields.items():
+                record[name] = value
+            self.count += 1
+
+            if self.count >= self.batch_size or time.time() - self.last_flush > self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        """Write all buffered records to the file"""
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        """Write buffered records, caller must hold the lock"""
+        if self.file is None:
+            self.open()
+
+        if self.count:
+            self.file.write(self.buffer[:self.count].tobytes())
+            self.file.flush()
+            self.records_written += self.count
+            self.count = 0
+        self.last_flush = time.time()
+
+    def close(self):
+        """Flush and close the log file"""
+        with self.lock:
+            if self.count:
+                # Opens the file if the run ended before the first flush
+                self._flush()
+            if self.file is None:
+                return
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class LatencyTracker:
+    """Rolling statistics of glass-to-decision latency
+
+    Feed it Frame.age() at the moment a decision based on the frame is
+    applied, e.g. right after the steering servo is commanded.
+    """
+
+    def __init__(self, window=300):
+        """Initialize the tracker
+
+        Args:
+            window (int): Number of recent samples used for the statistics
+        """
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, latency):
+        """Add a latency sample
+
+        Args:
+            latency (float): Latency in seconds
+        """
+        with self.lock:
+            self.samples.append(latency)
+
+    def stats(self):
+        """Get latency statistics over the window
+
+        Returns:
+            dict: Sample count and mean, median, 95th percentile and max in milliseconds
+        """
+        with self.lock:
+            samples = np.array(self.samples, dtype=np.float64)
+        if samples.size == 0:
+            return {'count': 0}
+
+        mean = samples.mean()
+        p50, p95 = np.percentile(samples, (50, 95))
+        return {
+            'count': int(samples.size),
+            'mean_ms': round(1000 * float(mean), 1),
+            'p50_ms': round(1000 * float(p50), 1),
+            'p95_ms': round(1000 * float(p95), 1),
+            'max_ms': round(1000 * float(samples.max()), 1),
+        }
+
+
+def load_telemetry(filename):
+    """Memory-map a telemetry log for analysis
+
+    Fields are accessed as columns, e.g. log['steering'] or log['sensors'][:, 0].
+
+    Args:
+        filename (str): Telemetry log file
+
+    Returns:
+        numpy.memmap: Read-only structured array of TELEMETRY_DTYPE records
+    """
+    with open(filename, 'rb') as f:
+        if f.read(HEADER_DTYPE.itemsize) != _make_header():
+            raise ValueError(f"{filename} is not a compatible telemetry log")
+
+    # Ignore a partially written trailing record
+    count = (os.path.getsize(filename) - HEADER_DTYPE.itemsize) // TELEMETRY_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=TELEMETRY_DTYPE)
+    return np.memmap(filename, dtype=TELEMETRY_DTYPE, mode='r',
+                     offset=HEADER_DTYPE.itemsize, shape=(count,))
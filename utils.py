@@ -57,4 +57,52 @@ def check_machine_type():
     elif machine_type == "aarch64":
         return 64, machine_type
     else:
-        return None, machine_type
\ No newline at end of file
+        return None, machine_type
+
+def get_cpu_temperature():
+    """Get the SoC temperature
+
+    Returns:
+        float: Temperature in degrees Celsius, or None if unavailable
+    """
+    try:
+        with open('/sys/class/thermal/thermal_zone0/temp') as f:
+            return int(f.read().strip()) / 1000
+    except (OSError, ValueError):
+        return None
+
+
+def get_cpu_times():
+    """Get the cumulative busy and total time of all CPU cores
+
+    Time spent waiting for I/O counts as idle, so blocking writes (e.g. to
+    the SD card) do not look like CPU load.
+
+    Returns:
+        tuple: (busy, total) in clock ticks since boot, or None if unavailable
+    """
+    try:
+        with open('/proc/stat') as f:
+            fields = [int(value) for value in f.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+
+    # user nice system idle iowait irq softirq steal, guest time is already in user
+    total = sum(fields[:8])
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+    return total - idle, total
+
+
+def get_cpu_load(previous, current):
+    """Get the CPU utilisation between two get_cpu_times() samples
+
+    Args:
+        previous (tuple): Earlier (busy, total) sample
+        current (tuple): Later (busy, total) sample
+
+    Returns:
+        float: Fraction of CPU time busy (1.0 means all cores busy), or None if unavailable
+    """
+    if previous is None or current is None or current[1] <= previous[1]:
+        return None
+    return (current[0] - previous[0]) / (current[1] - previous[1])